@@ -7,6 +7,7 @@ Helps users save energy and costs by running appliances at optimal times.
 import os
 import sys
 import json
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
@@ -34,6 +35,21 @@ GENAI_KEY = os.getenv("GENAI_KEY")
 if GENAI_KEY:
     genai.configure(api_key=GENAI_KEY)
 
+# Built once on first use and shared across requests
+_ALERTS_MODEL_NAME = "gemini-2.5-flash"
+_alerts_model = None
+_alerts_model_lock = threading.Lock()
+
+
+def _get_alerts_model():
+    """Return the shared GenerativeModel for alert generation."""
+    global _alerts_model
+    if _alerts_model is None:
+        with _alerts_model_lock:
+            if _alerts_model is None:
+                _alerts_model = genai.GenerativeModel(_ALERTS_MODEL_NAME)
+    return _alerts_model
+
 router = APIRouter()
 
 # ============================================================
@@ -351,7 +367,7 @@ def generate_appliance_alerts(username: str, force_refresh: bool = False) -> Dic
 
     # ---- Call GenAI ----
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
+        model = _get_alerts_model()
         response = model.generate_content(
             prompt,
             generation_config=genai.GenerationConfig(
@@ -6,11 +6,13 @@ Handles user signup, login, and user data management.
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Any, Dict, Union
-from datetime import datetime, timezone
+from datetime import datetime
 import zoneinfo
+import asyncio
 import os
 
 from database import db
+from api.hvac_simulation.hvac_physics import attach_house_coeffs, strip_house_coeffs
 
 # ============================================================
 # Constants
@@ -19,6 +21,8 @@ from database import db
 TIMEZONE = "America/Toronto"
 GEOAPIFY_URL = "https://api.geoapify.com/v1/geocode/search"
 
+_TZ = zoneinfo.ZoneInfo(TIMEZONE)    # built once, not per login
+
 # ============================================================
 # Request Models
 # ============================================================
@@ -52,14 +56,12 @@ router = APIRouter()
 
 def _get_today_date() -> str:
     """Get today's date in ISO format for the configured timezone."""
-    return datetime.now(timezone.utc).astimezone(
-        zoneinfo.ZoneInfo(TIMEZONE)
-    ).date().isoformat()
+    return datetime.now(_TZ).date().isoformat()
 
 
 def _refresh_user_weather(username: str, address: str) -> None:
     """Refresh user's weather data if it's outdated."""
-    import requests
+    from api.user_data_collection.address_to_latlon import _SESSION
     from api.user_data_collection.weather_api import fetch_and_export_weather
 
     key = os.environ.get("GEOAPIFY_KEY")
@@ -69,7 +71,7 @@ def _refresh_user_weather(username: str, address: str) -> None:
     try:
         # Geocode the address
         params = {"text": address, "format": "json", "apiKey": key}
-        response = requests.get(GEOAPIFY_URL, params=params, timeout=10)
+        response = _SESSION.get(GEOAPIFY_URL, params=params, timeout=10)
         
         if response.status_code != 200:
             return
@@ -92,20 +94,42 @@ def _refresh_user_weather(username: str, address: str) -> None:
         print(f"Warning: Failed to refresh weather for {username}: {e}")
 
 
+def _complete_login(username: str) -> dict:
+    """Post-authentication work for /login (blocking DB and network calls)."""
+    address = db.get_user_address(username)
+
+    # Refresh weather data once per day
+    try:
+        today = _get_today_date()
+        last_weather_date = db.get_user_weather_date(username)
+        
+        if last_weather_date != today and address:
+            _refresh_user_weather(username, address)
+    except Exception as e:
+        print(f"Warning: Weather refresh failed for {username}: {e}")
+
+    return {"ok": True, "username": username, "address": address}
+
+
 # ============================================================
 # Auth Endpoints
 # ============================================================
 
 @router.post("/signup")
-def signup(data: SignupModel):
-    """Create a new user account."""
+async def signup(data: SignupModel):
+    """Create a new user account.
+
+    Password hashing (scrypt, ~50 ms) runs on db's dedicated hashing pool;
+    hashlib releases the GIL, so concurrent signups/logins hash in parallel
+    without tying up the threadpool shared by the other endpoints.
+    """
     if not data.username or not data.password:
         raise HTTPException(status_code=400, detail="Username and password required")
     
     if not data.address or not data.address.strip():
         raise HTTPException(status_code=400, detail="Address required for signup")
     
-    success = db.create_user(data.username, data.password, data.address.strip())
+    success = await db.create_user_async(data.username, data.password, data.address.strip())
     if not success:
         raise HTTPException(status_code=400, detail="Username already exists")
     
@@ -113,27 +137,15 @@ def signup(data: SignupModel):
 
 
 @router.post("/login")
-def login(data: LoginModel):
-    """Authenticate a user."""
+async def login(data: LoginModel):
+    """Authenticate a user (password check runs off the event loop, as in signup)."""
     if not data.username or not data.password:
         raise HTTPException(status_code=400, detail="Username and password required")
     
-    if not db.verify_user(data.username, data.password):
+    if not await db.verify_user_async(data.username, data.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    address = db.get_user_address(data.username)
-
-    # Refresh weather data once per day
-    try:
-        today = _get_today_date()
-        last_weather_date = db.get_user_weather_date(data.username)
-        
-        if last_weather_date != today and address:
-            _refresh_user_weather(data.username, address)
-    except Exception as e:
-        print(f"Warning: Weather refresh failed for {data.username}: {e}")
-
-    return {"ok": True, "username": data.username, "address": address}
+    return await asyncio.to_thread(_complete_login, data.username)
 
 
 # ============================================================
@@ -171,7 +183,7 @@ def save_user_house(req: HouseDataRequest):
     if not req.username:
         raise HTTPException(status_code=400, detail="Username required")
     
-    if not db.set_user_house(req.username, req.data):
+    if not db.set_user_house(req.username, attach_house_coeffs(req.data)):
         raise HTTPException(status_code=404, detail="User not found")
     
     return {"ok": True}
@@ -187,4 +199,4 @@ def get_user_house(username: str):
     if data is None:
         raise HTTPException(status_code=404, detail="No saved house variables for user")
     
-    return {"data": data}
+    return {"data": strip_house_coeffs(data)}
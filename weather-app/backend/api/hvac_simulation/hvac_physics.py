@@ -31,16 +31,33 @@ import os
 import sys
 import json
 import re
-import math
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+import numpy as np
 from dotenv import load_dotenv
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent))
 
+from .kernels import (
+    DT_HOUR,
+    q_conductive as _q_conductive,
+    q_wind as _q_wind,
+    cop as _cop,
+    rc_step as _rc_step_kernel,
+    physics_step as _physics_step_kernel,
+    physics_step_batch as _physics_step_batch_kernel,
+    rc_terms as _rc_terms,
+    forecast_scan as _forecast_scan,
+    MODE_AUTO,
+    MODE_OFF,
+    MODE_HEAT,
+    MODE_COOL,
+)
+
 # ── optional GenAI import ────────────────────────────────────────────────────
 try:
     import google.generativeai as genai
@@ -54,6 +71,12 @@ GENAI_KEY = os.getenv("GENAI_KEY") or os.getenv("GOOGLE_API_KEY") or os.getenv("
 if _GENAI_AVAILABLE and GENAI_KEY:
     genai.configure(api_key=GENAI_KEY)
 
+# The GenerativeModel is built once on first use and shared by every call.
+_GENAI_MODEL_NAME = "gemini-2.5-flash-lite"
+_genai_model      = None
+_genai_config     = None
+_genai_lock       = threading.Lock()
+
 # ── Circuit breaker for GenAI quota errors ───────────────────────────────────
 from datetime import timedelta
 _CB_DISABLED_UNTIL: Optional[datetime] = None
@@ -64,10 +87,8 @@ _CB_COOLDOWN_SECONDS = 3600
 #  SECTION 1 — Physical Constants & Building Defaults
 # ════════════════════════════════════════════════════════════════════════════
 
-RHO_AIR   = 1.2
-CP_AIR    = 1005.0
+# RHO_AIR, CP_AIR and DT_HOUR live in kernels.py alongside the compiled RC math
 DT_STEP   = 300.0
-DT_HOUR   = 3600.0
 
 INSULATION_PRESETS: Dict[str, Dict[str, float]] = {
     "excellent": {"u_value": 0.25, "r_original": 10.0, "ach_base": 0.15},
@@ -84,6 +105,10 @@ HVAC_CAPACITY_BASE: Dict[str, Dict[str, float]] = {
     "none":       {"heating": 0.0,  "cooling": 0.0},
 }
 
+# Bound lookups for the per-house parsers (no attribute lookup per call)
+_GET_INSULATION = INSULATION_PRESETS.get
+_GET_HVAC_CAPS  = HVAC_CAPACITY_BASE.get
+
 _TOU_ON_PEAK   = 0.182
 _TOU_MID_PEAK  = 0.122
 _TOU_OFF_PEAK  = 0.087
@@ -106,17 +131,6 @@ def get_24h_prices() -> List[float]:
     return [get_electricity_price(h) for h in range(24)]
 
 
-def _wet_bulb(t_dry: float, rh: float) -> float:
-    wb = (
-        t_dry * math.atan(0.151977 * (rh + 8.313659) ** 0.5)
-        + math.atan(t_dry + rh)
-        - math.atan(rh - 1.676331)
-        + 0.00391838 * rh ** 1.5 * math.atan(0.023101 * rh)
-        - 4.686035
-    )
-    return min(wb, t_dry)
-
-
 def _house_geometry(house_data: Dict[str, Any]) -> Dict[str, float]:
     area_m2 = (
         house_data.get("floor_area_m2")
@@ -141,28 +155,31 @@ def _thermal_mass(area_m2: float) -> float:
 
 
 def _insulation_params(house_data: Dict[str, Any]) -> Dict[str, float]:
-    quality = str(house_data.get("insulation_quality", "average")).lower()
-    preset  = INSULATION_PRESETS.get(quality, INSULATION_PRESETS["average"]).copy()
-    for key in ("u_value", "r_original", "ach_base"):
-        if house_data.get(key) is not None:
-            preset[key] = float(house_data[key])
-    return preset
+    quality = house_data.get("insulation_quality", "average")
+    preset  = _GET_INSULATION(
+        quality.lower() if isinstance(quality, str) else "average",
+        INSULATION_PRESETS["average"],
+    )
+    overrides = {
+        key: float(house_data[key])
+        for key in ("u_value", "r_original", "ach_base")
+        if house_data.get(key) is not None
+    }
+    return {**preset, **overrides}
 
 
 def _hvac_capacity(house_data: Dict[str, Any], mode: str) -> float:
-    hvac_type  = str(house_data.get("hvac_type", "central")).lower()
-    caps       = HVAC_CAPACITY_BASE.get(hvac_type, HVAC_CAPACITY_BASE["central"])
+    hvac_type  = house_data.get("hvac_type", "central")
+    caps       = _GET_HVAC_CAPS(
+        hvac_type.lower() if isinstance(hvac_type, str) else "central",
+        HVAC_CAPACITY_BASE["central"],
+    )
     base_kw    = caps.get(mode, 3.0)
     area_m2    = _house_geometry(house_data)["floor_area_m2"]
     scale      = max(0.5, min(2.5, area_m2 / 150.0))
     return round(base_kw * scale, 2)
 
 
-def _cop(t_out: float, cop_base: float) -> float:
-    degradation = 0.03 * abs(t_out - 20.0)
-    return max(1.0, min(cop_base * 1.2, cop_base - degradation))
-
-
 def _sqft_to_m2(sqft: float) -> float:
     return float(sqft) * 0.0929
 
@@ -175,33 +192,142 @@ def fahrenheit_to_celsius(f: float) -> float:
     return (f - 32) * 5 / 9
 
 
-# ════════════════════════════════════════════════════════════════════════════
-#  SECTION 3 — RC Thermal Model (pure physics)
-# ════════════════════════════════════════════════════════════════════════════
+# ── Pre-parsed house parameters ──────────────────────────────────────────────
+# The RC model reads ~15 values out of the house dict on every step (and the
+# physics schedule does that ~850 times per regeneration).  HouseParams holds
+# the derived values once so hot loops use slot attribute loads instead of
+# repeated dict probes, float() casts and geometry recomputation.
+
+@dataclass(slots=True)
+class HouseParams:
+    floor_area_m2:   float
+    envelope_m2:     float
+    window_m2:       float
+    volume_m3:       float
+    c_home:          float
+    u_value:         float
+    r_original:      float
+    ach_base:        float
+    shgc:            float
+    k_wind:          float
+    latent_coeff:    float
+    humidity_target: float
+    cop_base:        float
+    deadband:        float
+    cap_heat_kw:     float
+    cap_cool_kw:     float
+
+
+# Key under which the derived coefficients are stored in the house blob,
+# as {"version": HOUSE_COEFFS_VERSION, "values": {HouseParams fields}}.
+# Bump the version with any change to the presets or to how house_params
+# derives a field: coefficients stored under another version are ignored
+# and recomputed.
+HOUSE_COEFFS_KEY     = "_coeffs"
+HOUSE_COEFFS_VERSION = 1
+
+
+def house_coeffs_current(house_data: Dict[str, Any]) -> bool:
+    """True if house_data carries coefficients stored by this version."""
+    coeffs = house_data.get(HOUSE_COEFFS_KEY)
+    return isinstance(coeffs, dict) and coeffs.get("version") == HOUSE_COEFFS_VERSION
+
+
+def house_params(house_data: Dict[str, Any]) -> HouseParams:
+    """
+    Parse a house dict into a HouseParams record (call once per house).
 
-def _q_conductive(u_eff, envelope_m2, t_boundary, t_in):
-    return u_eff * envelope_m2 * (t_boundary - t_in)
+    Uses the coefficients stored at save time (HOUSE_COEFFS_KEY) when
+    they match HOUSE_COEFFS_VERSION, so envelope / thermal-mass / capacity
+    arithmetic is skipped.
+    """
+    if house_coeffs_current(house_data):
+        try:
+            return HouseParams(**house_data[HOUSE_COEFFS_KEY]["values"])
+        except (KeyError, TypeError):
+            pass    # malformed — recompute below
+    geo = _house_geometry(house_data)
+    ins = _insulation_params(house_data)
+    return HouseParams(
+        floor_area_m2   = geo["floor_area_m2"],
+        envelope_m2     = geo["envelope_m2"],
+        window_m2       = geo["window_m2"],
+        volume_m3       = geo["volume_m3"],
+        c_home          = _thermal_mass(geo["floor_area_m2"]),
+        u_value         = ins["u_value"],
+        r_original      = ins["r_original"],
+        ach_base        = ins["ach_base"],
+        shgc            = float(house_data.get("shgc", 0.4)),
+        k_wind          = float(house_data.get("k_wind", 0.02)),
+        latent_coeff    = float(house_data.get("latent_coeff", 150.0)),
+        humidity_target = float(house_data.get("humidity_target", 50.0)),
+        cop_base        = float(house_data.get("cop_base", 3.5)),
+        deadband        = float(house_data.get("deadband_c", 1.0)),
+        cap_heat_kw     = _hvac_capacity(house_data, "heating"),
+        cap_cool_kw     = _hvac_capacity(house_data, "cooling"),
+    )
 
 
-def _q_wind(volume_m3, ach_base, k_wind, wind_ms, t_out, t_in):
-    ach = ach_base + k_wind * wind_ms
-    return RHO_AIR * CP_AIR * volume_m3 * (ach / DT_HOUR) * (t_out - t_in)
+def precompute_house_coeffs(house_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive the versioned HouseParams coefficients for storage alongside the house data."""
+    fresh = {k: v for k, v in house_data.items() if k != HOUSE_COEFFS_KEY}
+    return {"version": HOUSE_COEFFS_VERSION, "values": asdict(house_params(fresh))}
 
 
-def _q_solar(window_m2, shgc, radiation_wm2, snow_depth_m):
-    eff_radiation = radiation_wm2 * (0.20 if snow_depth_m > 0.05 else 1.0)
-    return window_m2 * shgc * eff_radiation
+def attach_house_coeffs(house: Any) -> Any:
+    """
+    Return a copy of a house payload with the derived coefficients
+    refreshed.  Accepts both stored shapes: {"data": {...},
+    "appliances": [...]} and the flat form dict (appliances inline).
+    Every house write path calls this; coefficients left by an older
+    HOUSE_COEFFS_VERSION are ignored by house_params and re-attached on read.
+    """
+    if not isinstance(house, dict):
+        return house
+    house = dict(house)
+    if isinstance(house.get("data"), dict):
+        data = house["data"] = dict(house["data"])
+    else:
+        data = house
+    data[HOUSE_COEFFS_KEY] = precompute_house_coeffs(data)
+    return house
+
+
+def strip_house_coeffs(house: Any) -> Any:
+    """Inverse of attach_house_coeffs: a copy of a stored house payload without the coefficients."""
+    if not isinstance(house, dict):
+        return house
+    house = {k: v for k, v in house.items() if k != HOUSE_COEFFS_KEY}
+    if isinstance(house.get("data"), dict):
+        house["data"] = {k: v for k, v in house["data"].items() if k != HOUSE_COEFFS_KEY}
+    return house
+
 
+def _as_params(house: Any) -> HouseParams:
+    """Accept either a raw house dict or an already-parsed HouseParams."""
+    return house if isinstance(house, HouseParams) else house_params(house)
 
-def _q_latent(latent_coeff, humidity_in, humidity_target):
-    return latent_coeff * max(0.0, humidity_in - humidity_target)
 
+# ════════════════════════════════════════════════════════════════════════════
+#  SECTION 3 — RC Thermal Model (pure physics)
+# ════════════════════════════════════════════════════════════════════════════
 
-def _rc_step(t_in, q_total_w, c_home, dt_s):
-    return t_in + (q_total_w * dt_s) / c_home
+# _wet_bulb, _q_conductive, _q_wind and _q_solar are imported from kernels.py
+
+
+def _rc_kernel(hp: "HouseParams", w: Dict[str, float], t_in, q_hvac_w, dt_s):
+    """Unpack house params + parsed weather into the compiled RC kernel."""
+    return _rc_step_kernel(
+        float(t_in), w["t_out"], w["humidity"], w["wind_ms"], w["radiation"],
+        w["precip"], w["snowfall"], w["snow_depth"],
+        hp.u_value, hp.r_original, hp.ach_base, hp.envelope_m2, hp.volume_m3,
+        hp.window_m2, hp.shgc, hp.k_wind, hp.c_home, float(q_hvac_w), float(dt_s),
+    )
 
 
 def _parse_weather(weather_data: Dict[str, Any]) -> Dict[str, float]:
+    if "t_out" in weather_data:
+        return weather_data     # already parsed (e.g. from a columnar weather table)
     return {
         "t_out":      float(weather_data.get("temperature_2m")   or weather_data.get("outdoor_temp") or 15.0),
         "humidity":   float(weather_data.get("relative_humidity_2m") or weather_data.get("humidity") or 50.0),
@@ -213,70 +339,48 @@ def _parse_weather(weather_data: Dict[str, Any]) -> Dict[str, float]:
     }
 
 
-def _physics_step(
-    house_data, t_in, t_target, weather_data,
-    hvac_mode_override=None, dt_s=DT_STEP,
-):
-    w   = _parse_weather(weather_data)
-    geo = _house_geometry(house_data)
-    ins = _insulation_params(house_data)
+_HEAT_MODES      = ("heat", "heating", "pre-heat", "pre_heat")
+_COOL_MODES      = ("cool", "cooling", "pre-cool", "pre_cool")
+_STEP_MODE_NAMES = {MODE_OFF: "off", MODE_HEAT: "heating", MODE_COOL: "cooling"}
 
-    shgc          = float(house_data.get("shgc", 0.4))
-    k_wind        = float(house_data.get("k_wind", 0.02))
-    latent_coeff  = float(house_data.get("latent_coeff", 150.0))
-    humidity_tgt  = float(house_data.get("humidity_target", 50.0))
-    cop_base      = float(house_data.get("cop_base", 3.5))
-    deadband      = float(house_data.get("deadband_c", 1.0))
+# Column order expected by kernels.physics_step_batch
+_WEATHER_FIELDS = (
+    "t_out", "humidity", "wind_ms", "radiation", "precip", "snowfall", "snow_depth",
+)
+_BATCH_HOUSE_FIELDS = (
+    "u_value", "r_original", "ach_base", "envelope_m2", "volume_m3", "window_m2",
+    "shgc", "k_wind", "c_home", "latent_coeff", "humidity_target", "cop_base",
+    "deadband", "cap_heat_kw", "cap_cool_kw",
+)
 
-    c_home    = _thermal_mass(geo["floor_area_m2"])
 
-    is_raining = w["precip"] > 0.1 and w["snowfall"] < 0.1
-    is_snowing = w["snowfall"] > 0.1
-    wet_bulb   = _wet_bulb(w["t_out"], w["humidity"])
-
-    if is_snowing and w["snow_depth"] > 0:
-        r_snow = min(w["snow_depth"] * 5.0, 10.0)
-        u_eff  = 1.0 / (ins["r_original"] + r_snow)
+def _physics_step(
+    house_data, t_in, t_target, weather_data,
+    hvac_mode_override=None, dt_s=DT_STEP, params=None,
+):
+    w  = _parse_weather(weather_data)
+    hp = params if params is not None else house_params(house_data)
+
+    if hvac_mode_override is None:
+        mode_code = MODE_AUTO
+    elif hvac_mode_override in _HEAT_MODES:
+        mode_code = MODE_HEAT
+    elif hvac_mode_override in _COOL_MODES:
+        mode_code = MODE_COOL
     else:
-        u_eff = ins["u_value"]
-
-    t_boundary = wet_bulb if is_raining else w["t_out"]
-
-    q_cond  = _q_conductive(u_eff, geo["envelope_m2"], t_boundary, t_in)
-    q_wind  = _q_wind(geo["volume_m3"], ins["ach_base"], k_wind,
-                      w["wind_ms"], w["t_out"], t_in)
-    q_solar = _q_solar(geo["window_m2"], shgc, w["radiation"], w["snow_depth"])
-
-    mode     = hvac_mode_override
-    q_hvac_w = 0.0
-    power_kw = 0.0
-
-    if mode is None:
-        temp_diff = t_target - t_in
-        if temp_diff > deadband:
-            mode = "heating"
-        elif temp_diff < -deadband:
-            mode = "cooling"
-        else:
-            mode = "off"
-
-    cap_heat_kw = _hvac_capacity(house_data, "heating")
-    cap_cool_kw = _hvac_capacity(house_data, "cooling")
-
-    if mode in ("heat", "heating", "pre-heat", "pre_heat"):
-        power_kw  = cap_heat_kw
-        q_hvac_w  = power_kw * 1000.0 * _cop(w["t_out"], cop_base)
-    elif mode in ("cool", "cooling", "pre-cool", "pre_cool"):
-        power_kw  = cap_cool_kw
-        q_hvac_w  = -power_kw * 1000.0 * _cop(w["t_out"], cop_base)
-
-    q_latent = _q_latent(latent_coeff, w["humidity"], humidity_tgt)
-    if mode in ("cool", "cooling", "pre-cool", "pre_cool") and q_latent > 0:
-        power_kw += q_latent / (1000.0 * _cop(w["t_out"], cop_base))
-
-    q_total  = q_cond + q_wind + q_solar + q_hvac_w
-    t_new    = _rc_step(t_in, q_total, c_home, dt_s)
-    t_new    = max(5.0, min(40.0, t_new))
+        mode_code = MODE_OFF
+
+    (t_new, mode_code, power_kw,
+     q_cond, q_wind, q_solar, q_hvac_w, q_total) = _physics_step_kernel(
+        float(t_in), float(t_target), w["t_out"], w["humidity"], w["wind_ms"],
+        w["radiation"], w["precip"], w["snowfall"], w["snow_depth"],
+        hp.u_value, hp.r_original, hp.ach_base, hp.envelope_m2, hp.volume_m3,
+        hp.window_m2, hp.shgc, hp.k_wind, hp.c_home, hp.latent_coeff,
+        hp.humidity_target, hp.cop_base, hp.deadband, hp.cap_heat_kw,
+        hp.cap_cool_kw, mode_code, float(dt_s),
+    )
+    mode  = hvac_mode_override if hvac_mode_override is not None else _STEP_MODE_NAMES[mode_code]
+    t_new = max(5.0, min(40.0, t_new))
 
     hours      = dt_s / DT_HOUR
     energy_kwh = power_kw * hours
@@ -306,28 +410,80 @@ def _physics_step(
     }
 
 
+def physics_step_batch(
+    params:   List[HouseParams],
+    weathers: List[Dict[str, Any]],
+    t_in:     List[float],
+    t_target: List[float],
+    dt_s:     float = DT_STEP,
+) -> List[Dict[str, Any]]:
+    """
+    Advance many houses by one deadband-controlled RC step in one vectorised
+    pass.  Inputs are parallel lists (one entry per house); returns one
+    {new_temp_c, hvac_mode, hvac_power_kw} dict per house.
+    """
+    if not params:
+        return []
+    ws = [_parse_weather(w) for w in weathers]
+
+    def col(values, dtype=np.float64) -> np.ndarray:
+        return np.fromiter(values, dtype=dtype, count=len(params))
+
+    # Static house coefficients are held as float32 (half the footprint per
+    # lane); state and weather stay float64 and NumPy promotes in the math.
+    t_new, mode, power_kw = _physics_step_batch_kernel(
+        col(t_in), col(t_target),
+        *(col(w[k] for w in ws) for k in _WEATHER_FIELDS),
+        *(col((getattr(p, k) for p in params), np.float32) for k in _BATCH_HOUSE_FIELDS),
+        float(dt_s),
+    )
+    t_new = np.clip(t_new, 5.0, 40.0)
+    return [
+        {
+            "new_temp_c":    round(float(t), 2),
+            "hvac_mode":     _STEP_MODE_NAMES[int(m)],
+            "hvac_power_kw": round(float(p), 3),
+            "engine":        "physics",
+        }
+        for t, m, p in zip(t_new, mode, power_kw)
+    ]
+
+
+def forecast_indoor_temp(
+    params:       HouseParams,
+    weather_cols: Dict[str, np.ndarray],
+    t0:           float,
+    dt_s:         float = DT_HOUR,
+    q_hvac_w:     float = 0.0,
+) -> np.ndarray:
+    """
+    Indoor temperature over a horizon of piecewise-constant weather steps.
+
+    weather_cols maps each _WEATHER_FIELDS name to an array (one entry per
+    step of dt_s seconds).  With weather and HVAC heat held constant over
+    a step, the RC model has the exact solution T_inf + (T − T_inf)·alpha,
+    so every step's T_inf and alpha = exp(−UA·dt/C) are computed in one
+    vectorised pass and only the recurrence itself is scanned.  q_hvac_w = 0
+    gives the free-running (HVAC off) drift.  Returns n + 1 temperatures,
+    starting with t0, unclamped.
+    """
+    ua_cond, ua_wind, t_boundary, q_solar = _rc_terms(
+        *(weather_cols[k] for k in _WEATHER_FIELDS),
+        params.u_value, params.r_original, params.ach_base, params.envelope_m2,
+        params.volume_m3, params.window_m2, params.shgc, params.k_wind,
+    )
+    ua    = ua_cond + ua_wind
+    t_inf = (ua_cond * t_boundary + ua_wind * weather_cols["t_out"] + q_solar + q_hvac_w) / ua
+    alpha = np.exp(-ua * dt_s / params.c_home)
+    return _forecast_scan(float(t0), t_inf, alpha)
+
+
 # ════════════════════════════════════════════════════════════════════════════
 #  SECTION 4 — Predictive Heuristic Controller (physics schedule)
 # ════════════════════════════════════════════════════════════════════════════
 
 def _predict_next_temp(house_data, t_in, weather_row, q_hvac_w=0.0):
-    w   = _parse_weather(weather_row)
-    geo = _house_geometry(house_data)
-    ins = _insulation_params(house_data)
-    shgc   = float(house_data.get("shgc", 0.4))
-    k_wind = float(house_data.get("k_wind", 0.02))
-    is_raining  = w["precip"] > 0.1 and w["snowfall"] < 0.1
-    is_snowing  = w["snowfall"] > 0.1
-    wet_bulb    = _wet_bulb(w["t_out"], w["humidity"])
-    t_boundary  = wet_bulb if is_raining else w["t_out"]
-    r_snow = min(w["snow_depth"] * 5.0, 10.0) if is_snowing and w["snow_depth"] > 0 else 0.0
-    u_eff  = (1.0 / (ins["r_original"] + r_snow)) if r_snow > 0 else ins["u_value"]
-    q_cond  = _q_conductive(u_eff, geo["envelope_m2"], t_boundary, t_in)
-    q_wind  = _q_wind(geo["volume_m3"], ins["ach_base"], k_wind, w["wind_ms"], w["t_out"], t_in)
-    q_solar = _q_solar(geo["window_m2"], shgc, w["radiation"], w["snow_depth"])
-    q_total = q_cond + q_wind + q_solar + q_hvac_w
-    c_home  = _thermal_mass(geo["floor_area_m2"])
-    return t_in + (q_total * DT_HOUR) / c_home
+    return _predict_next_temp_step(house_data, t_in, weather_row, q_hvac_w, DT_HOUR)
 
 
 def _heuristic_mode(
@@ -335,20 +491,18 @@ def _heuristic_mode(
     weather_h, weather_h1, weather_h2,
     price_h, price_h2,
 ):
-    cap_w_heat = _hvac_capacity(house_data, "heating") * 1000.0
-    cap_w_cool = _hvac_capacity(house_data, "cooling") * 1000.0
-    cop_base   = float(house_data.get("cop_base", 3.5))
+    hp         = _as_params(house_data)
+    cap_w_heat = hp.cap_heat_kw * 1000.0
+    cap_w_cool = hp.cap_cool_kw * 1000.0
 
-    t_pred_h1  = _predict_next_temp(house_data, t_in,      weather_h,  0.0)
-    t_pred_h2  = _predict_next_temp(house_data, t_pred_h1, weather_h1, 0.0)
+    t_pred_h1  = _predict_next_temp(hp, t_in,      weather_h,  0.0)
+    t_pred_h2  = _predict_next_temp(hp, t_pred_h1, weather_h1, 0.0)
 
     if t_pred_h1 > t_set + deadband:
-        q = max(-cap_w_cool, (_thermal_mass(_house_geometry(house_data)["floor_area_m2"])
-                               * (t_set - t_pred_h1) / DT_HOUR))
+        q = max(-cap_w_cool, hp.c_home * (t_set - t_pred_h1) / DT_HOUR)
         return "cool", q
     if t_pred_h1 < t_set - deadband:
-        q = min(cap_w_heat, (_thermal_mass(_house_geometry(house_data)["floor_area_m2"])
-                              * (t_set - t_pred_h1) / DT_HOUR))
+        q = min(cap_w_heat, hp.c_home * (t_set - t_pred_h1) / DT_HOUR)
         return "heat", q
     if t_pred_h2 > t_set + deadband and price_h < price_h2:
         return "pre-cool", -cap_w_cool * 0.5
@@ -358,23 +512,8 @@ def _heuristic_mode(
 
 
 def _predict_next_temp_step(house_data, t_in, weather_row, q_hvac_w=0.0, dt_s=DT_STEP):
-    w   = _parse_weather(weather_row)
-    geo = _house_geometry(house_data)
-    ins = _insulation_params(house_data)
-    shgc   = float(house_data.get("shgc", 0.4))
-    k_wind = float(house_data.get("k_wind", 0.02))
-    is_raining = w["precip"] > 0.1 and w["snowfall"] < 0.1
-    is_snowing = w["snowfall"] > 0.1
-    wet_bulb   = _wet_bulb(w["t_out"], w["humidity"])
-    t_boundary = wet_bulb if is_raining else w["t_out"]
-    r_snow = min(w["snow_depth"] * 5.0, 10.0) if is_snowing and w["snow_depth"] > 0 else 0.0
-    u_eff  = (1.0 / (ins["r_original"] + r_snow)) if r_snow > 0 else ins["u_value"]
-    q_cond  = _q_conductive(u_eff, geo["envelope_m2"], t_boundary, t_in)
-    q_wind  = _q_wind(geo["volume_m3"], ins["ach_base"], k_wind, w["wind_ms"], w["t_out"], t_in)
-    q_solar = _q_solar(geo["window_m2"], shgc, w["radiation"], w["snow_depth"])
-    q_total = q_cond + q_wind + q_solar + q_hvac_w
-    c_home  = _thermal_mass(geo["floor_area_m2"])
-    return t_in + (q_total * dt_s) / c_home
+    hp = _as_params(house_data)
+    return _rc_kernel(hp, _parse_weather(weather_row), t_in, q_hvac_w, dt_s)[0]
 
 
 def _physics_schedule(
@@ -387,7 +526,8 @@ def _physics_schedule(
     STEPS_PER_HR  = int(DT_HOUR / STEP_S)
     TOTAL_STEPS   = 24 * STEPS_PER_HR
 
-    deadband      = float(house_data.get("deadband_c", 1.0))
+    hp            = house_params(house_data)
+    deadband      = hp.deadband
     overshoot_db  = deadband * 0.3
     lam           = float(house_data.get("comfort_weight", 0.5))
     prices        = get_24h_prices()
@@ -407,13 +547,10 @@ def _physics_schedule(
         return weather_rows[idx]
 
     def _q_for_mode(mode, t_out):
-        cop_base = float(house_data.get("cop_base", 3.5))
         if "heat" in mode:
-            kw = _hvac_capacity(house_data, "heating")
-            return kw * 1000.0 * _cop(t_out, cop_base)
+            return hp.cap_heat_kw * 1000.0 * _cop(t_out, hp.cop_base)
         if "cool" in mode:
-            kw = _hvac_capacity(house_data, "cooling")
-            return -kw * 1000.0 * _cop(t_out, cop_base)
+            return -hp.cap_cool_kw * 1000.0 * _cop(t_out, hp.cop_base)
         return 0.0
 
     MIN_ON_STEPS  = 6
@@ -443,7 +580,7 @@ def _physics_schedule(
         price_h2 = prices[(abs_hour + 2) % 24]
 
         desired_mode, _ = _heuristic_mode(
-            house_data, t_in, t_set, deadband,
+            hp, t_in, t_set, deadband,
             w_row, wh1, wh2, price_h, price_h2
         )
 
@@ -473,10 +610,7 @@ def _physics_schedule(
                 active = None
 
             if desired_mode != "off":
-                cap_kw = _hvac_capacity(
-                    house_data,
-                    "heating" if "heat" in desired_mode else "cooling"
-                )
+                cap_kw = hp.cap_heat_kw if "heat" in desired_mode else hp.cap_cool_kw
                 active = {
                     "hour":            abs_hour,
                     "mode":            desired_mode,
@@ -512,7 +646,7 @@ def _physics_schedule(
             run_cycles[-1]["predicted_temp_c"] = round(t_in, 1)
 
         q_hvac = _q_for_mode(desired_mode, w["t_out"])
-        t_new  = _predict_next_temp_step(house_data, t_in, w_row, q_hvac, STEP_S)
+        t_new  = _predict_next_temp_step(hp, t_in, w_row, q_hvac, STEP_S)
         t_new  = max(5.0, min(40.0, t_new))
 
         if active is not None:
@@ -916,6 +1050,21 @@ def _build_schedule_prompt(
 }}"""
 
 
+def _get_genai_model():
+    """Return the shared (model, generation_config) pair, building it once."""
+    global _genai_model, _genai_config
+    if _genai_model is None:
+        with _genai_lock:
+            if _genai_model is None:
+                _genai_config = genai.GenerationConfig(
+                    temperature=0.1,
+                    max_output_tokens=4096,
+                    response_mime_type="application/json",
+                )
+                _genai_model = genai.GenerativeModel(_GENAI_MODEL_NAME)
+    return _genai_model, _genai_config
+
+
 def _call_genai(prompt: str) -> Optional[Dict]:
     global _CB_DISABLED_UNTIL
 
@@ -930,15 +1079,8 @@ def _call_genai(prompt: str) -> Optional[Dict]:
             _CB_DISABLED_UNTIL = None
 
     try:
-        model    = genai.GenerativeModel("gemini-2.5-flash-lite")
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=4096,
-                response_mime_type="application/json",
-            )
-        )
+        model, config = _get_genai_model()
+        response = model.generate_content(prompt, generation_config=config)
         text = response.text.strip()
         text = re.sub(r'^```(?:json)?\s*', '', text)
         text = re.sub(r'\s*```$', '', text)
@@ -1341,6 +1483,17 @@ def _compute_physics_energy_floor(
 #  SECTION 6 — Data Classes
 # ════════════════════════════════════════════════════════════════════════════
 
+# Integer codes for schedule modes; index order is the summary order.
+SCHEDULE_MODES: Tuple[str, ...] = ("heat", "cool", "pre-heat", "pre-cool", "off")
+MODE_TO_INT:    Dict[str, int]  = {m: i for i, m in enumerate(SCHEDULE_MODES)}
+_MODE_OFF_CODE = MODE_TO_INT["off"]
+
+
+def mode_codes(modes) -> List[int]:
+    """Map mode strings to MODE_TO_INT codes (unknown modes count as off)."""
+    return [MODE_TO_INT.get(m, _MODE_OFF_CODE) for m in modes]
+
+
 @dataclass
 class HVACAction:
     hour: int
@@ -1365,6 +1518,7 @@ class HVACSchedule:
     def to_dict(self) -> dict:
         return {
             "actions":          [asdict(a) for a in self.actions],
+            "mode_codes":       mode_codes(a.mode for a in self.actions),
             "total_cost":       self.total_cost,
             "total_energy_kwh": self.total_energy_kwh,
             "comfort_score":    self.comfort_score,
@@ -1385,6 +1539,7 @@ def simulate_step_with_hvac(
     personal_comfort:     Optional[float] = None,
     dt_s:                 float = DT_STEP,
     sim_hour:             Optional[int] = None,   # FIX BUG-4: pass to prompt builder
+    params:               Optional[HouseParams] = None,
 ) -> Dict[str, Any]:
     if target_temp_c is None:
         target_temp_c = house_data.get("personal_comfort", 22.0)
@@ -1435,6 +1590,7 @@ def simulate_step_with_hvac(
         t_target     = t_target,
         weather_data = weather_data,
         dt_s         = dt_s,
+        params       = params,
     )
 
 
@@ -1529,12 +1685,14 @@ def predict_temperature(
     hvac_mode:           str = "off",
     target_temp_c:       Optional[float] = None,
     timestep_minutes:    int = 5,
+    params:              Optional[HouseParams] = None,
 ) -> Dict[str, Any]:
     return simulate_step_with_hvac(
         house_data            = house_data,
         current_indoor_temp_c = current_indoor_temp_c,
         target_temp_c         = target_temp_c,
         weather_data          = weather_data,
+        params                = params,
     )
 
 
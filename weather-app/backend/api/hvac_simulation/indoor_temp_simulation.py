@@ -8,18 +8,24 @@ Call surface unchanged from original — existing routes work without edits.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import sys
 from pathlib import Path
+
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent))
 
 from database.db import (
     get_user_state,
     update_simulated_temp,
+    update_simulated_temp_bulk,
     set_hvac_sim,
     get_hvac_sim,
     get_user_id,
+    set_user_house,
     set_target_setpoint,
     get_target_setpoint,
 )
@@ -29,22 +35,49 @@ from .hvac_physics import (
     get_upcoming_actions,
     simulate_step_with_hvac,
     predict_temperature,
+    physics_step_batch,
+    forecast_indoor_temp,
     optimize_setpoint_ai,
     celsius_to_fahrenheit,
     HVACSchedule,
+    SCHEDULE_MODES,
+    mode_codes,
+    HouseParams,
+    house_params,
+    attach_house_coeffs,
+    house_coeffs_current,
     get_electricity_price,
+    _parse_weather,
+    _WEATHER_FIELDS,
+    _call_genai,
     _SETPOINT_REFRESH_INTERVAL_S,
 )
 
 DEFAULT_TIMESTEP_MINUTES = 5
 MAX_TIMESTEP_SECONDS     = 300   # cap: never advance more than 5 min in one poll
 FIRST_STEP_SECONDS       = 60    # first-call step size — avoids a sudden temp jump on mount
+BATCH_MAX_USERS          = 500   # most usernames one run_simulation_step_batch call accepts
 _SCHEDULE_MAX_AGE_S      = 3600  # regenerate schedule after 1 hour
 
 # Per-user wall-clock time of last simulation step.
 # Key: user_id (int)  Value: datetime of last successful step
 _last_step_times: Dict[int, datetime] = {}
 
+# Per-user parsed house parameters, reused across ticks until the stored
+# house dict changes (e.g. the user resubmits the house form).
+# Key: user_id (int)  Value: (house_data the params were built from, params)
+_house_params_cache: Dict[int, Tuple[Dict, HouseParams]] = {}
+
+
+def _get_house_params(user_id: int, house_data: Dict) -> HouseParams:
+    """Return cached HouseParams for user_id, rebuilding only on change."""
+    cached = _house_params_cache.get(user_id)
+    if cached is not None and cached[0] == house_data:
+        return cached[1]
+    params = house_params(house_data)
+    _house_params_cache[user_id] = (house_data, params)
+    return params
+
 
 def _schedule_is_stale(hvac_schedule: Optional[Dict]) -> bool:
     """
@@ -66,7 +99,7 @@ def _schedule_is_stale(hvac_schedule: Optional[Dict]) -> bool:
     generated_at = hvac_schedule.get("generated_at")
     if generated_at:
         try:
-            gen_time = datetime.fromisoformat(generated_at)
+            gen_time = _parse_iso(generated_at)
             if (datetime.now() - gen_time).total_seconds() > _SCHEDULE_MAX_AGE_S:
                 return True
         except Exception:
@@ -188,10 +221,21 @@ def _get_or_refresh_ai_setpoint(
 #  Internal helpers
 # ════════════════════════════════════════════════════════════════════════════
 
+@lru_cache(maxsize=256)
+def _parse_iso(value: str) -> datetime:
+    """datetime.fromisoformat, memoised — the same timestamps recur every tick."""
+    return datetime.fromisoformat(value)
+
+
 def _parse_weather_row_time(date_str: str) -> Optional[datetime]:
     """Parse '2025-12-19 14:00:00 EST' — drops timezone token."""
     if not isinstance(date_str, str):
         return None
+    return _parse_weather_row_time_cached(date_str)
+
+
+@lru_cache(maxsize=1024)
+def _parse_weather_row_time_cached(date_str: str) -> Optional[datetime]:
     parts = date_str.split(" ")
     base  = " ".join(parts[:2]) if len(parts) >= 3 else date_str
     try:
@@ -200,19 +244,80 @@ def _parse_weather_row_time(date_str: str) -> Optional[datetime]:
         return None
 
 
-def _select_weather_row(weather_rows: List[Dict], target_time: datetime) -> Optional[Dict]:
-    """Return the row whose datetime is closest to target_time."""
-    best_row, best_delta = None, None
-    for row in weather_rows:
+# Columnar view of a weather set: row timestamps plus each parsed physics
+# field as a NumPy column.  Built once per weather set so a tick's row
+# lookup is one vectorised argmin and its inputs are indexed loads instead
+# of re-parsing date strings and re-probing row dicts.  Cached per user and
+# reused while the rows the table was built from compare equal to the
+# current ones, like _house_params_cache: rows are re-read from the DB on
+# each request, and a same-day refresh may revise any value.
+_WEATHER_CACHE_MAX = 256
+_NO_TIME           = np.int64(2 ** 62)   # sentinel for rows without a usable date
+
+
+@dataclass(slots=True)
+class _WeatherTable:
+    times: np.ndarray              # int64 naive epoch-seconds, _NO_TIME if unusable
+    cols:  Dict[str, np.ndarray]   # _parse_weather field -> float64 column
+
+
+# Key: user_id (int)  Value: (weather_rows the table was built from, table)
+_weather_tables: Dict[int, Tuple[List[Dict], _WeatherTable]] = {}
+
+
+def _build_weather_table(weather_rows: List[Dict]) -> _WeatherTable:
+    n     = len(weather_rows)
+    times = np.full(n, _NO_TIME, dtype=np.int64)
+    cols  = {k: np.full(n, np.nan) for k in _WEATHER_FIELDS}
+    for i, row in enumerate(weather_rows):
         if not isinstance(row, dict):
             continue
         t = _parse_weather_row_time(row.get("date", ""))
-        if t is None:
-            continue
-        delta = abs((t - target_time).total_seconds())
-        if best_delta is None or delta < best_delta:
-            best_delta, best_row = delta, row
-    return best_row
+        if t is not None:
+            times[i] = np.datetime64(t, "s").astype(np.int64)
+        try:
+            for k, v in _parse_weather(row).items():
+                cols[k][i] = v
+        except (TypeError, ValueError):
+            pass
+    return _WeatherTable(times=times, cols=cols)
+
+
+def _weather_table(user_id: int, weather_rows: List[Dict]) -> _WeatherTable:
+    """Return user_id's columnar view of weather_rows, rebuilding only on change."""
+    cached = _weather_tables.get(user_id)
+    if cached is not None and cached[0] == weather_rows:
+        return cached[1]
+    table = _build_weather_table(weather_rows)
+    if user_id not in _weather_tables and len(_weather_tables) >= _WEATHER_CACHE_MAX:
+        _weather_tables.pop(next(iter(_weather_tables)))
+    _weather_tables[user_id] = (weather_rows, table)
+    return table
+
+
+def _select_weather_index(
+    user_id: int, weather_rows: List[Dict], target_time: datetime,
+) -> Optional[int]:
+    """Index of the row whose datetime is closest to target_time (None if no dated rows)."""
+    if not weather_rows:
+        return None
+    times = _weather_table(user_id, weather_rows).times
+    idx   = int(np.abs(times - np.datetime64(target_time, "s").astype(np.int64)).argmin())
+    return None if times[idx] == _NO_TIME else idx
+
+
+def _select_weather_row(
+    user_id: int, weather_rows: List[Dict], target_time: datetime,
+) -> Optional[Dict]:
+    """Return the row whose datetime is closest to target_time."""
+    idx = _select_weather_index(user_id, weather_rows, target_time)
+    return weather_rows[idx] if idx is not None else None
+
+
+def _weather_values(user_id: int, weather_rows: List[Dict], idx: int) -> Dict[str, float]:
+    """Parsed physics inputs for row idx, read straight from the columns."""
+    cols = _weather_table(user_id, weather_rows).cols
+    return {k: float(cols[k][idx]) for k in _WEATHER_FIELDS}
 
 
 def _extract_weather_rows(raw_weather: Any) -> List[Dict]:
@@ -465,6 +570,15 @@ def _get_state_or_error(username: str) -> tuple:
     if not house:
         return None, None, None, {"error": "House data missing — submit house information first"}
     house_data = house.get("data", house) if isinstance(house, dict) else house
+    if not isinstance(house_data, dict):
+        return None, None, None, {"error": "House data invalid — resubmit house information"}
+    if not house_coeffs_current(house_data):
+        # Saved before coefficients were stored, or by an older
+        # HOUSE_COEFFS_VERSION: backfill once so later ticks (and other
+        # workers) read them instead of recomputing
+        house = attach_house_coeffs(house)
+        set_user_house(username, house)
+        house_data = house.get("data", house)
     return state, user_id, house_data, None
 
 
@@ -485,21 +599,22 @@ def run_simulation_step(username: str) -> Dict:
     if not weather_rows:
         return {"error": "Weather rows missing"}
 
-    weather = _select_weather_row(weather_rows, datetime.now()) or weather_rows[0]
+    weather = _select_weather_row(user_id, weather_rows, datetime.now()) or weather_rows[0]
     if "temperature_2m" not in weather:
         return {"error": "temperature_2m missing from weather data"}
 
     outdoor_temp = float(weather["temperature_2m"])
     indoor_temp  = state.get("simulated_temp")
     if indoor_temp is None:
+        # Seed from outdoor temp; the step below persists the result
         indoor_temp = outdoor_temp
-        update_simulated_temp(user_id, indoor_temp)
 
     result   = predict_temperature(
         house_data            = house_data,
         current_indoor_temp_c = float(indoor_temp),
         weather_data          = weather,
         timestep_minutes      = DEFAULT_TIMESTEP_MINUTES,
+        params                = _get_house_params(user_id, house_data),
     )
     new_temp = result.get("new_temp_c", indoor_temp)
     update_simulated_temp(user_id, new_temp)
@@ -512,6 +627,71 @@ def run_simulation_step(username: str) -> Dict:
     }
 
 
+def run_simulation_step_batch(usernames: List[str]) -> Dict[str, Dict]:
+    """
+    Physics-only simulation tick for many users at once.
+
+    Loads each user's state, advances every house in one vectorised RC step
+    (deadband control around the saved setpoint / comfort temperature) and
+    writes all new temperatures back in a single bulk upsert.
+    Returns {username: step result or {"error": ...}}.
+    """
+    results: Dict[str, Dict] = {}
+    batch:   List[Tuple[str, int, float, float, Dict, HouseParams]] = []
+
+    for username in usernames:
+        state, user_id, house_data, err = _get_state_or_error(username)
+        if err:
+            results[username] = err
+            continue
+        weather_rows = _extract_weather_rows(state.get("weather")) if state.get("weather") else []
+        if not weather_rows:
+            results[username] = {"error": "Weather rows missing"}
+            continue
+        idx = _select_weather_index(user_id, weather_rows, datetime.now())
+        if idx is None:
+            idx = 0
+        weather = _weather_values(user_id, weather_rows, idx)
+        if weather["t_out"] != weather["t_out"]:      # NaN: row unusable
+            results[username] = {"error": "Weather rows missing"}
+            continue
+
+        indoor_temp = state.get("simulated_temp")
+        if indoor_temp is None:
+            indoor_temp = weather["t_out"]
+        target = state.get("target_setpoint")
+        if target is None:
+            target = house_data.get("personal_comfort", 22.0)
+        target = max(15.0, min(30.0, float(target)))
+
+        batch.append((username, user_id, float(indoor_temp), target, weather,
+                      _get_house_params(user_id, house_data)))
+
+    if not batch:
+        return results
+
+    steps = physics_step_batch(
+        params   = [b[5] for b in batch],
+        weathers = [b[4] for b in batch],
+        t_in     = [b[2] for b in batch],
+        t_target = [b[3] for b in batch],
+        dt_s     = DEFAULT_TIMESTEP_MINUTES * 60,
+    )
+    update_simulated_temp_bulk([(b[1], step["new_temp_c"]) for b, step in zip(batch, steps)])
+
+    for (username, _, indoor_temp, target, weather, _), step in zip(batch, steps):
+        results[username] = {
+            "T_in_prev":     round(indoor_temp, 2),
+            "T_in_new":      step["new_temp_c"],
+            "T_out":         round(weather["t_out"], 2),
+            "hvac_mode":     _map_hvac_status(step["hvac_mode"]),
+            "hvac_power_kw": step["hvac_power_kw"],
+            "target_temp":   target,
+            "engine":        step["engine"],
+        }
+    return results
+
+
 def run_hvac_ai(username: str, target_temp_c: float = None) -> Dict:
     """
     Return the 24-hour HVAC schedule, refreshing notifications from the
@@ -659,12 +839,12 @@ def run_simulation_step_with_hvac(
     if not weather_rows:
         return {"error": "Weather rows missing"}
 
-    weather_row = _select_weather_row(weather_rows, datetime.now()) or weather_rows[0]
+    weather_row = _select_weather_row(user_id, weather_rows, datetime.now()) or weather_rows[0]
 
     indoor_temp = state.get("simulated_temp")
     if indoor_temp is None:
+        # Seed from outdoor temp; the step below persists the result
         indoor_temp = float(weather_row.get("temperature_2m", 20))
-        update_simulated_temp(user_id, indoor_temp)
 
     target = _resolve_target_temp(
         user_id, state, house_data, target_temp_c,
@@ -722,6 +902,7 @@ def run_simulation_step_with_hvac(
         hvac_schedule         = hvac_schedule,
         personal_comfort      = target,
         dt_s                  = elapsed_s,
+        params                = _get_house_params(user_id, house_data),
     )
 
     new_temp   = result.get("new_temp_c", indoor_temp)
@@ -801,6 +982,67 @@ def run_simulation_step_with_hvac(
     return response
 
 
+# ════════════════════════════════════════════════════════════════════════════
+#  Forecast
+# ════════════════════════════════════════════════════════════════════════════
+
+FORECAST_MAX_HOURS = 168
+
+
+def get_indoor_forecast(username: str, hours: int = 24) -> Dict:
+    """
+    Hour-by-hour indoor temperature if the HVAC stays off, starting from the
+    current simulated temperature and the weather row closest to now.
+
+    Uses the closed-form RC solution over the whole horizon in one pass
+    (forecast_indoor_temp) instead of looping the single-step simulation.
+    """
+    state, user_id, house_data, err = _get_state_or_error(username)
+    if err:
+        return err
+
+    weather_rows = _extract_weather_rows(state.get("weather"))
+    if not weather_rows:
+        return {"error": "Weather rows missing"}
+
+    start = _select_weather_index(user_id, weather_rows, datetime.now())
+    if start is None:
+        return {"error": "Weather rows missing"}
+    hours = max(1, min(int(hours), FORECAST_MAX_HOURS))
+    cols  = {k: v[start:start + hours] for k, v in _weather_table(user_id, weather_rows).cols.items()}
+
+    # Stop at the first row without a usable outdoor temperature
+    bad = np.flatnonzero(np.isnan(cols["t_out"]))
+    if bad.size:
+        cols = {k: v[:bad[0]] for k, v in cols.items()}
+    n = len(cols["t_out"])
+    if n == 0:
+        return {"error": "Weather rows missing"}
+    # Remaining NaNs (e.g. no snow depth reported) mean "none"
+    cols = {k: np.nan_to_num(v) for k, v in cols.items()}
+
+    indoor_temp = state.get("simulated_temp")
+    if indoor_temp is None:
+        indoor_temp = cols["t_out"][0]
+    indoor_temp = max(5.0, min(40.0, float(indoor_temp)))
+
+    temps = forecast_indoor_temp(_get_house_params(user_id, house_data), cols, float(indoor_temp))
+    temps = np.clip(temps, 5.0, 40.0)
+    return {
+        "start_temp_c":   round(float(indoor_temp), 2),
+        "hours":          [
+            {
+                "time":           weather_rows[start + i].get("date"),
+                "outdoor_temp_c": round(float(cols["t_out"][i]), 2),
+                "indoor_temp_c":  round(float(temps[i + 1]), 2),
+            }
+            for i in range(n)
+        ],
+        "hvac_mode":      "off",
+        "engine":         "physics",
+    }
+
+
 # ════════════════════════════════════════════════════════════════════════════
 #  Setpoint management
 # ════════════════════════════════════════════════════════════════════════════
@@ -842,6 +1084,12 @@ def get_current_setpoint(username: str) -> Dict:
 #  Schedule utilities
 # ════════════════════════════════════════════════════════════════════════════
 
+# A stored schedule never changes until it is regenerated (which stamps a new
+# generated_at), so its summary is memoised per (user_id, generated_at).
+_SUMMARY_CACHE_MAX = 256
+_summary_cache: Dict[Tuple[int, str], Dict] = {}
+
+
 def get_hvac_schedule_summary(username: str) -> Dict:
     state = get_user_state(username)
     if state is None:
@@ -849,11 +1097,20 @@ def get_hvac_schedule_summary(username: str) -> Dict:
     sched = state.get("hvac_sim")
     if sched is None:
         return {"error": "No HVAC schedule found — run HVAC AI first"}
-    mode_counts = {m: 0 for m in ("heat", "cool", "pre-heat", "pre-cool", "off")}
-    for a in sched.get("actions", []):
-        m = a.get("mode", "off")
-        mode_counts[m if m in mode_counts else "off"] += 1
-    return {
+
+    generated_at = sched.get("generated_at")
+    cache_key    = (state["id"], generated_at) if generated_at else None
+    if cache_key in _summary_cache:
+        return dict(_summary_cache[cache_key])
+
+    # Schedules store their mode codes at generation time; older rows
+    # without them are encoded on the fly.
+    codes = sched.get("mode_codes")
+    if codes is None:
+        codes = mode_codes(a.get("mode", "off") for a in sched.get("actions", []))
+    counts      = np.bincount(np.asarray(codes, dtype=np.int8), minlength=len(SCHEDULE_MODES))
+    mode_counts = {m: int(n) for m, n in zip(SCHEDULE_MODES, counts)}
+    summary = {
         "generated_at":     sched.get("generated_at"),
         "total_cost":       sched.get("total_cost", 0),
         "total_energy_kwh": sched.get("total_energy_kwh", 0),
@@ -862,6 +1119,63 @@ def get_hvac_schedule_summary(username: str) -> Dict:
         "actions_count":    len(sched.get("actions", [])),
         "engine":           sched.get("engine", "unknown"),
     }
+    if cache_key is not None:
+        if len(_summary_cache) >= _SUMMARY_CACHE_MAX:
+            _summary_cache.pop(next(iter(_summary_cache)))
+        _summary_cache[cache_key] = summary
+    return dict(summary)
+
+
+# Adjustments at or below this size, with indoor already within
+# _FAST_PATH_MAX_GAP_C of the new target, skip the Gemini call entirely.
+_FAST_PATH_MAX_ADJUSTMENT_C = 1.0
+_FAST_PATH_MAX_GAP_C        = 2.0
+
+
+def _physics_recommendation(
+    house_data:   Dict,
+    indoor_temp:  float,
+    temp_target:  float,
+    adjustment_c: float,
+    outdoor_temp: float,
+    rate:         float,
+) -> Dict:
+    """RC-physics recommendation used for the fast path and as GenAI fallback."""
+    need_heat = temp_target > indoor_temp
+    from .hvac_physics import (
+        _cop, _thermal_mass, _house_geometry,
+        _hvac_capacity,
+    )
+
+    # Use actual house HVAC capacity (not hardcoded)
+    hvac_cap_kw = (
+        _hvac_capacity(house_data, "heating") if need_heat
+        else _hvac_capacity(house_data, "cooling")
+    )
+
+    # Get proper COP based on outdoor temperature
+    cop_val = _cop(outdoor_temp, float(house_data.get("cop_base", 3.5)))
+    q_w = hvac_cap_kw * 1000.0 * cop_val  # Heat/cool capacity in Watts
+
+    # Calculate thermal mass for accurate estimation
+    geo = _house_geometry(house_data)
+    c_home = _thermal_mass(geo["floor_area_m2"])
+
+    # Time to reach target (minutes) = mass × temp_delta / power
+    temp_delta = abs(temp_target - indoor_temp)
+    dt_min = max(1.0, (temp_delta * c_home) / max(q_w * 60.0, 1.0))
+    energy_kwh = hvac_cap_kw * dt_min / 60.0
+
+    return {
+        "apply_now":                        True,
+        "reason":                           f"RC physics estimate: {geo['floor_area_m2']:.0f}m² home with {c_home/1e6:.1f}MJ/°C thermal mass",
+        "hvac_mode":                        "heat" if need_heat else "cool",
+        "estimated_time_to_target_minutes": round(dt_min, 1),
+        "estimated_energy_kwh":             round(energy_kwh, 3),
+        "estimated_cost":                   round(energy_kwh * rate, 4),
+        "recommended_action":               f"{'Heating' if need_heat else 'Cooling'} {hvac_cap_kw:.1f}kW system to {temp_target:.1f}°C",
+        "comfort_impact":                   "positive" if abs(adjustment_c) <= 2.0 else "moderate",
+    }
 
 
 def apply_temporary_adjustment(
@@ -871,8 +1185,8 @@ def apply_temporary_adjustment(
 ) -> Dict:
     """
     Shift the setpoint by adjustment_c for duration_minutes.
-    Uses GenAI for the recommendation if available; falls back to
-    pure physics reasoning.
+    Small adjustments near the target use the physics recommendation
+    directly; larger ones ask GenAI first and fall back to physics.
     """
     state, user_id, house_data, err = _get_state_or_error(username)
     if err:
@@ -884,67 +1198,44 @@ def apply_temporary_adjustment(
 
     raw_weather   = state.get("weather")
     weather_rows  = _extract_weather_rows(raw_weather) if raw_weather else []
-    current_w     = _select_weather_row(weather_rows, datetime.now()) or {}
+    current_w     = _select_weather_row(user_id, weather_rows, datetime.now()) or {}
     outdoor_temp  = float(current_w.get("temperature_2m", 15))
     current_hour  = datetime.now().hour
     rate          = get_electricity_price(current_hour)
 
-    # Try GenAI for recommendation; fall back to physics
+    # Small nudges close to the target have a deterministic answer (apply now),
+    # so skip the Gemini round-trip for them; otherwise try GenAI and fall
+    # back to physics.
     ai = None
-    try:
-        from .hvac_physics import _call_genai
-        _lines = [
-            "Recommend whether to apply a temporary HVAC adjustment.",
-            f"Indoor: {indoor_temp:.1f}C  Setpoint: {base_setpoint:.1f}C",
-            f"Adjustment: {adjustment_c:+.1f}C -> new target {temp_target:.1f}C for {duration_minutes} min",
-            f"Outdoor: {outdoor_temp}C  Rate: ${rate}/kWh",
-            f"HVAC: {house_data.get('hvac_type', 'central')}",
-            "",
-            "Return JSON only: apply_now bool, reason str, hvac_mode str,",
-            "estimated_time_to_target_minutes num, estimated_energy_kwh num,",
-            "estimated_cost num, recommended_action str, comfort_impact str",
-        ]
-        ai = _call_genai("\n".join(_lines))
-    except Exception:
-        ai = None
+    policy_source = "heuristic"
+    fast_path = (
+        abs(adjustment_c) <= _FAST_PATH_MAX_ADJUSTMENT_C
+        and abs(temp_target - float(indoor_temp)) <= _FAST_PATH_MAX_GAP_C
+    )
+    if not fast_path:
+        try:
+            _lines = [
+                "Recommend whether to apply a temporary HVAC adjustment.",
+                f"Indoor: {indoor_temp:.1f}C  Setpoint: {base_setpoint:.1f}C",
+                f"Adjustment: {adjustment_c:+.1f}C -> new target {temp_target:.1f}C for {duration_minutes} min",
+                f"Outdoor: {outdoor_temp}C  Rate: ${rate}/kWh",
+                f"HVAC: {house_data.get('hvac_type', 'central')}",
+                "",
+                "Return JSON only: apply_now bool, reason str, hvac_mode str,",
+                "estimated_time_to_target_minutes num, estimated_energy_kwh num,",
+                "estimated_cost num, recommended_action str, comfort_impact str",
+            ]
+            ai = _call_genai("\n".join(_lines))
+        except Exception:
+            ai = None
+        if ai is not None:
+            policy_source = "ai"
 
     if ai is None:
-        # Physics-based recommendation using proper house data
-        need_heat = temp_target > float(indoor_temp)
-        from .hvac_physics import (
-            _cop, _thermal_mass, _house_geometry, 
-            _hvac_capacity, _insulation_params
-        )
-        
-        # Use actual house HVAC capacity (not hardcoded)
-        hvac_cap_kw = (
-            _hvac_capacity(house_data, "heating") if need_heat 
-            else _hvac_capacity(house_data, "cooling")
+        ai = _physics_recommendation(
+            house_data, float(indoor_temp), temp_target,
+            adjustment_c, outdoor_temp, rate,
         )
-        
-        # Get proper COP based on outdoor temperature
-        cop_val = _cop(outdoor_temp, float(house_data.get("cop_base", 3.5)))
-        q_w = hvac_cap_kw * 1000.0 * cop_val  # Heat/cool capacity in Watts
-        
-        # Calculate thermal mass for accurate estimation
-        geo = _house_geometry(house_data)
-        c_home = _thermal_mass(geo["floor_area_m2"])
-        
-        # Time to reach target (minutes) = mass × temp_delta / power
-        temp_delta = abs(temp_target - float(indoor_temp))
-        dt_min = max(1.0, (temp_delta * c_home) / max(q_w * 60.0, 1.0))
-        energy_kwh = hvac_cap_kw * dt_min / 60.0
-        
-        ai = {
-            "apply_now":                        True,
-            "reason":                           f"RC physics estimate: {geo['floor_area_m2']:.0f}m² home with {c_home/1e6:.1f}MJ/°C thermal mass",
-            "hvac_mode":                        "heat" if need_heat else "cool",
-            "estimated_time_to_target_minutes": round(dt_min, 1),
-            "estimated_energy_kwh":             round(energy_kwh, 3),
-            "estimated_cost":                   round(energy_kwh * rate, 4),
-            "recommended_action":               f"{'Heating' if need_heat else 'Cooling'} {hvac_cap_kw:.1f}kW system to {temp_target:.1f}°C",
-            "comfort_impact":                   "positive" if abs(adjustment_c) <= 2.0 else "moderate",
-        }
 
     if ai.get("apply_now", True):
         set_target_setpoint(user_id, temp_target)
@@ -959,6 +1250,7 @@ def apply_temporary_adjustment(
         "current_indoor_c":   indoor_temp,
         "outdoor_temp_c":     outdoor_temp,
         "ai_recommendation":  ai,
+        "policy_source":      policy_source,
         "timestamp":          datetime.now().isoformat(),
     }
 
@@ -0,0 +1,287 @@
+"""
+RC Thermal Kernels
+==================
+Pure-float building blocks of the RC thermal model, compiled with Numba
+when it is installed.
+
+Every physics path (live step, hourly prediction, 5-minute schedule
+prediction) calls into this one module, so a process compiles each kernel
+once and `cache=True` lets later processes load the compiled artifact
+from __pycache__ instead of recompiling.
+
+Kernels take and return plain floats only — callers unpack HouseParams
+and the parsed weather dict before calling in.
+"""
+
+import math
+
+import numpy as np
+
+# ── optional Numba import ────────────────────────────────────────────────────
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so kernels run as plain Python without Numba."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+
+RHO_AIR   = 1.2
+CP_AIR    = 1005.0
+DT_HOUR   = 3600.0
+
+# ρ·cp per second of air change: infiltration UA = AIR_VCP_S · V · ACH.
+# Folded once here so the kernels carry one multiply instead of three.
+AIR_VCP_S = RHO_AIR * CP_AIR / DT_HOUR
+
+# HVAC mode codes used by physics_step (strings never cross into the kernel)
+MODE_AUTO = -1   # pick from the deadband around t_target
+MODE_OFF  = 0
+MODE_HEAT = 1
+MODE_COOL = 2
+
+
+@njit(cache=True)
+def wet_bulb(t_dry, rh):
+    """Stull (2011) wet-bulb temperature, capped at the dry-bulb value."""
+    wb = (
+        t_dry * math.atan(0.151977 * (rh + 8.313659) ** 0.5)
+        + math.atan(t_dry + rh)
+        - math.atan(rh - 1.676331)
+        + 0.00391838 * rh ** 1.5 * math.atan(0.023101 * rh)
+        - 4.686035
+    )
+    return min(wb, t_dry)
+
+
+@njit(cache=True)
+def q_conductive(u_eff, envelope_m2, t_boundary, t_in):
+    return u_eff * envelope_m2 * (t_boundary - t_in)
+
+
+@njit(cache=True)
+def q_wind(volume_m3, ach_base, k_wind, wind_ms, t_out, t_in):
+    ach = ach_base + k_wind * wind_ms
+    return AIR_VCP_S * volume_m3 * ach * (t_out - t_in)
+
+
+@njit(cache=True)
+def q_solar(window_m2, shgc, radiation_wm2, snow_depth_m):
+    eff_radiation = radiation_wm2 * (0.20 if snow_depth_m > 0.05 else 1.0)
+    return window_m2 * shgc * eff_radiation
+
+
+@njit(cache=True)
+def cop(t_out, cop_base):
+    """COP degraded linearly with distance from 20 °C outdoor."""
+    degradation = 0.03 * abs(t_out - 20.0)
+    return max(1.0, min(cop_base * 1.2, cop_base - degradation))
+
+
+@njit(cache=True)
+def rc_step(
+    t_in, t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+    u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+    shgc, k_wind, c_home, q_hvac_w, dt_s,
+):
+    """
+    Advance indoor temperature by dt_s seconds.
+
+    Conduction and infiltration are both linear in T_in, so the step uses
+    the exact solution of the first-order ODE rather than forward Euler:
+
+        UA    = u_eff·A + ρ·cp·V·ACH/3600
+        T_inf = (u_eff·A·T_boundary + ρ·cp·V·ACH/3600·T_out + Q_solar + Q_hvac) / UA
+        T_new = T_inf + (T_in − T_inf)·exp(−UA·dt / C)
+
+    This stays accurate (and never overshoots T_inf) for the hourly steps
+    used by the schedule look-ahead.
+
+    Returns (t_new, q_cond, q_wind, q_solar, q_total) — heat flows in W,
+    evaluated at t_in.  t_new is not clamped; callers apply their own bounds.
+    """
+    is_raining = precip > 0.1 and snowfall < 0.1
+    is_snowing = snowfall > 0.1
+
+    if is_snowing and snow_depth > 0:
+        u_eff = 1.0 / (r_original + min(snow_depth * 5.0, 10.0))
+    else:
+        u_eff = u_value
+
+    t_boundary = wet_bulb(t_out, humidity) if is_raining else t_out
+
+    # Conductances computed once and shared by the flows and the step
+    ua_cond = u_eff * envelope_m2
+    ua_wind = AIR_VCP_S * volume_m3 * (ach_base + k_wind * wind_ms)
+    ua      = ua_cond + ua_wind
+
+    qc = ua_cond * (t_boundary - t_in)
+    qw = ua_wind * (t_out - t_in)
+    qs = q_solar(window_m2, shgc, radiation, snow_depth)
+    q_total = qc + qw + qs + q_hvac_w
+    if ua > 0.0:
+        t_inf = (ua_cond * t_boundary + ua_wind * t_out + qs + q_hvac_w) / ua
+        t_new = t_inf + (t_in - t_inf) * math.exp(-ua * dt_s / c_home)
+    else:
+        t_new = t_in + (q_total * dt_s) / c_home
+    return t_new, qc, qw, qs, q_total
+
+
+@njit(cache=True)
+def physics_step(
+    t_in, t_target, t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+    u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+    shgc, k_wind, c_home, latent_coeff, humidity_target, cop_base, deadband,
+    cap_heat_kw, cap_cool_kw, mode, dt_s,
+):
+    """
+    One controlled RC step: resolve the HVAC mode, its power and heat flow,
+    then advance the temperature.
+
+    `mode` is a MODE_* code; MODE_AUTO applies the deadband controller.
+    Returns (t_new, mode, power_kw, q_cond, q_wind, q_solar, q_hvac, q_total).
+    """
+    if mode == MODE_AUTO:
+        temp_diff = t_target - t_in
+        mode = MODE_HEAT * (temp_diff > deadband) + MODE_COOL * (temp_diff < -deadband)
+
+    # Branchless mode selection: heat/cool are 0.0/1.0 (lowered to selects),
+    # so the sign and the capacity pick are arithmetic rather than jumps
+    heat    = 1.0 if mode == MODE_HEAT else 0.0
+    cool    = 1.0 if mode == MODE_COOL else 0.0
+    cop_eff = cop(t_out, cop_base)
+    power_kw = heat * cap_heat_kw + cool * cap_cool_kw
+    q_hvac_w = (heat - cool) * power_kw * 1000.0 * cop_eff
+    # Dehumidification adds electrical load but no sensible heat
+    q_latent = latent_coeff * max(0.0, humidity - humidity_target)
+    power_kw += cool * q_latent / (1000.0 * cop_eff)
+
+    t_new, qc, qw, qs, q_total = rc_step(
+        t_in, t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+        u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+        shgc, k_wind, c_home, q_hvac_w, dt_s,
+    )
+    return t_new, mode, power_kw, qc, qw, qs, q_hvac_w, q_total
+
+
+def rc_terms(
+    t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+    u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+    shgc, k_wind,
+):
+    """
+    rc_step's weather-dependent terms over arrays (one lane per house or
+    per time step): returns (ua_cond, ua_wind, t_boundary, q_solar).
+    """
+    # Boundary temperature (wet-bulb when raining) and snow-stacked U
+    is_raining = (precip > 0.1) & (snowfall < 0.1)
+    is_snowing = (snowfall > 0.1) & (snow_depth > 0)
+    wb = (
+        t_out * np.arctan(0.151977 * np.sqrt(humidity + 8.313659))
+        + np.arctan(t_out + humidity)
+        - np.arctan(humidity - 1.676331)
+        + 0.00391838 * humidity ** 1.5 * np.arctan(0.023101 * humidity)
+        - 4.686035
+    )
+    t_boundary = np.where(is_raining, np.minimum(wb, t_out), t_out)
+    u_eff = np.where(
+        is_snowing,
+        1.0 / (r_original + np.minimum(snow_depth * 5.0, 10.0)),
+        u_value,
+    )
+
+    q_solar = window_m2 * shgc * radiation * np.where(snow_depth > 0.05, 0.20, 1.0)
+    ua_cond = u_eff * envelope_m2
+    ua_wind = AIR_VCP_S * volume_m3 * (ach_base + k_wind * wind_ms)
+    return ua_cond, ua_wind, t_boundary, q_solar
+
+
+def physics_step_batch(
+    t_in, t_target, t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+    u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+    shgc, k_wind, c_home, latent_coeff, humidity_target, cop_base, deadband,
+    cap_heat_kw, cap_cool_kw, dt_s,
+):
+    """
+    physics_step (MODE_AUTO) over a batch of houses at once.
+
+    Every argument except dt_s is a 1-D float64 array with one lane per
+    house (structure-of-arrays); the whole power balance runs as NumPy
+    array ops.  Returns (t_new, mode, power_kw) arrays — t_new unclamped,
+    mode as MODE_* codes.
+    """
+    # Deadband controller
+    temp_diff = t_target - t_in
+    mode = np.where(temp_diff > deadband, MODE_HEAT,
+                    np.where(temp_diff < -deadband, MODE_COOL, MODE_OFF))
+    heat = mode == MODE_HEAT
+    cool = mode == MODE_COOL
+
+    cop_eff  = np.maximum(1.0, np.minimum(cop_base * 1.2, cop_base - 0.03 * np.abs(t_out - 20.0)))
+    power_kw = heat * cap_heat_kw + cool * cap_cool_kw
+    q_hvac_w = (heat.astype(np.float64) - cool) * power_kw * 1000.0 * cop_eff
+    q_latent = latent_coeff * np.maximum(0.0, humidity - humidity_target)
+    power_kw = power_kw + cool * (q_latent / (1000.0 * cop_eff))
+
+    ua_cond, ua_wind, t_boundary, q_solar = rc_terms(
+        t_out, humidity, wind_ms, radiation, precip, snowfall, snow_depth,
+        u_value, r_original, ach_base, envelope_m2, volume_m3, window_m2,
+        shgc, k_wind,
+    )
+    ua = ua_cond + ua_wind
+
+    # Exact exponential step, as in rc_step (ua > 0 for any real house)
+    t_inf = (ua_cond * t_boundary + ua_wind * t_out + q_solar + q_hvac_w) / ua
+    t_new = t_inf + (t_in - t_inf) * np.exp(-ua * dt_s / c_home)
+    return t_new, mode, power_kw
+
+
+@njit(cache=True)
+def forecast_scan(t0, t_inf, alpha):
+    """
+    Closed-form RC recurrence over a horizon:
+
+        T[k+1] = T_inf[k] + (T[k] − T_inf[k]) · alpha[k]
+
+    with alpha[k] = exp(−UA[k]·dt / C).  The exp() terms are computed
+    vectorised by the caller; only this sequential scan runs per step.
+    Returns T[0..n] (n + 1 values, T[0] = t0).
+    """
+    n = t_inf.shape[0]
+    out = np.empty(n + 1)
+    out[0] = t0
+    t = t0
+    for k in range(n):
+        t = t_inf[k] + (t - t_inf[k]) * alpha[k]
+        out[k + 1] = t
+    return out
+
+
+def warm_kernels() -> None:
+    """
+    Compile (or load from the on-disk cache) every kernel with the argument
+    types used at runtime, so the first simulation request doesn't pay the
+    JIT cost.  Safe to call more than once; a no-op without Numba.
+    """
+    if not _NUMBA_AVAILABLE:
+        return
+    wet_bulb(10.0, 50.0)
+    q_conductive(0.6, 300.0, 0.0, 20.0)
+    q_wind(400.0, 0.5, 0.02, 3.0, 0.0, 20.0)
+    q_solar(20.0, 0.4, 100.0, 0.0)
+    cop(0.0, 3.5)
+    rc_step(
+        20.0, 0.0, 50.0, 3.0, 100.0, 0.0, 0.0, 0.0,
+        0.6, 5.0, 0.5, 300.0, 400.0, 20.0, 0.4, 0.02, 4.2e7, 0.0, 300.0,
+    )
+    physics_step(
+        20.0, 22.0, 0.0, 50.0, 3.0, 100.0, 0.0, 0.0, 0.0,
+        0.6, 5.0, 0.5, 300.0, 400.0, 20.0, 0.4, 0.02, 4.2e7,
+        150.0, 50.0, 3.5, 1.0, 10.0, 3.5, MODE_AUTO, 300.0,
+    )
+    forecast_scan(20.0, np.zeros(2), np.ones(2))
@@ -4,8 +4,24 @@ Resolves addresses to coordinates using Geoapify service.
 """
 
 from fastapi import APIRouter, HTTPException
+from typing import Dict, Optional
+import asyncio
+import functools
 import os
+import re
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.user_data_collection.weather_api import WEATHER_RESPONSE_CLASS
+
+# ── optional HTTP/2 support (httpx[http2] installs h2) ───────────────────────
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
 
 # ============================================================
 # Constants
@@ -16,33 +32,70 @@ REQUEST_TIMEOUT = 10
 
 router = APIRouter()
 
+# Shared session: keep-alive + TLS session reuse, so repeat lookups skip the
+# TCP/TLS handshake.  Transient gateway errors are retried twice.
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept-Encoding": "gzip"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections = 10,
+    pool_maxsize     = 20,
+    max_retries      = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
+# Async client for the async endpoints; opened on app startup and closed on
+# shutdown (see start_async_client / close_async_client in main.py)
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+
+# Resolved addresses keyed by normalised text, most recently used last
+_GEOCODE_CACHE_MAX = 4096
+_geocode_cache: Dict[str, dict] = {}
+
+# Runs of whitespace, collapsed to one space when normalising addresses
+_WS = re.compile(r"\s+")
+
 # ============================================================
 # Helper Functions
 # ============================================================
 
+@functools.cache
 def _get_api_key() -> str:
-    """Get Geoapify API key from environment."""
+    """
+    Get Geoapify API key from environment.
+
+    Resolved on first use (main.py loads .env after this module is imported)
+    and then cached; a missing key raises, which is not cached, so setting
+    it later still takes effect.
+    """
     key = os.environ.get("GEOAPIFY_KEY")
     if not key:
         raise HTTPException(status_code=500, detail="Geoapify key not configured on server")
     return key
 
 
-def _geocode_address(address: str) -> dict:
-    """Resolve address to coordinates."""
-    key = _get_api_key()
-    
-    params = {"text": address, "format": "json", "apiKey": key}
-    
-    try:
-        response = requests.get(GEOAPIFY_URL, params=params, timeout=REQUEST_TIMEOUT)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Geocoding request failed: {e}")
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=502, detail=f"Geocoding service returned {response.status_code}")
+def _normalize_address(address: str) -> str:
+    """Cache key for an address: trimmed, case-folded, single-spaced."""
+    return _WS.sub(" ", address).strip().lower()
+
+
+def _cache_get(key: str) -> Optional[dict]:
+    hit = _geocode_cache.pop(key, None)
+    if hit is not None:
+        _geocode_cache[key] = hit    # move to the most-recent end
+        return dict(hit)
+    return None
+
+
+def _cache_put(key: str, result: dict) -> None:
+    if len(_geocode_cache) >= _GEOCODE_CACHE_MAX:
+        _geocode_cache.pop(next(iter(_geocode_cache)))
+    _geocode_cache[key] = result
+
+
+def _parse_geocode_response(status_code: int, data: dict) -> dict:
+    """Validate a Geoapify response and extract the first match."""
+    if status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Geocoding service returned {status_code}")
     
-    data = response.json()
     results = data.get("results", [])
     
     if not results:
@@ -62,6 +115,79 @@ def _geocode_address(address: str) -> dict:
     }
 
 
+def _geocode_address(address: str) -> dict:
+    """Resolve address to coordinates."""
+    cache_key = _normalize_address(address)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    key = _get_api_key()
+    
+    params = {"text": address, "format": "json", "apiKey": key}
+    
+    try:
+        response = _SESSION.get(GEOAPIFY_URL, params=params, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Geocoding request failed: {e}")
+    
+    data = response.json() if response.status_code == 200 else {}
+    result = _parse_geocode_response(response.status_code, data)
+    _cache_put(cache_key, result)
+    return dict(result)
+
+
+async def _geocode_address_async(address: str) -> dict:
+    """Resolve address to coordinates without blocking the event loop."""
+    cache_key = _normalize_address(address)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    key = _get_api_key()
+    
+    params = {"text": address, "format": "json", "apiKey": key}
+    
+    try:
+        response = await _get_async_client().get(GEOAPIFY_URL, params=params)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Geocoding request failed: {e}")
+    
+    data = response.json() if response.status_code == 200 else {}
+    result = _parse_geocode_response(response.status_code, data)
+    _cache_put(cache_key, result)
+    return dict(result)
+
+
+# ============================================================
+# Async Client Lifecycle
+# ============================================================
+
+def start_async_client() -> None:
+    """Open the shared async HTTP client (called on app startup)."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            http2   = _HTTP2_AVAILABLE,
+            timeout = REQUEST_TIMEOUT,
+            limits  = httpx.Limits(max_keepalive_connections=20),
+        )
+
+
+async def close_async_client() -> None:
+    """Close the shared async HTTP client (called on app shutdown)."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # Opened lazily when the app is used without its startup hooks
+    start_async_client()
+    return _ASYNC_CLIENT
+
+
 # ============================================================
 # Endpoints
 # ============================================================
@@ -75,8 +201,8 @@ def geocode(address: str):
     return _geocode_address(address)
 
 
-@router.get("/weather_address")
-def weather_by_address(address: str, days_ahead: int = 7):
+@router.get("/weather_address", response_class=WEATHER_RESPONSE_CLASS)
+async def weather_by_address(address: str, days_ahead: int = 7, include_text: bool = False):
     """
     Geocode the address, then fetch and return weather data.
     Returns the same structure as the /weather endpoint.
@@ -85,14 +211,17 @@ def weather_by_address(address: str, days_ahead: int = 7):
         raise HTTPException(status_code=400, detail="Address query param required")
     
     # Geocode the address
-    geo_result = _geocode_address(address)
+    geo_result = await _geocode_address_async(address)
     lat, lon = geo_result["lat"], geo_result["lon"]
     
     # Fetch weather data
     from api.user_data_collection.weather_api import fetch_and_export_weather
     
     try:
-        weather = fetch_and_export_weather(lat, lon, days_ahead=days_ahead)
+        # The Open-Meteo client is synchronous; run it off the event loop
+        weather = await asyncio.to_thread(
+            fetch_and_export_weather, lat, lon, days_ahead=days_ahead, include_text=include_text
+        )
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Failed to fetch weather: {e}")
     
@@ -7,6 +7,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
 from database import db
+from api.hvac_simulation.hvac_physics import attach_house_coeffs
 
 # ============================================================
 # Models
@@ -42,18 +43,20 @@ def save_house_variables(vars: HouseVariables):
         raise HTTPException(status_code=400, detail="Username required to save house variables")
 
     try:
-        # Build house object
-        house_obj = {
+        # Build house object; attach_house_coeffs adds the derived RC
+        # coefficients so the simulation never recomputes them
+        house_obj = attach_house_coeffs({
             "data": vars.model_dump(exclude={"appliances", "username"}),
             "appliances": vars.appliances or [],
-        }
+        })
 
-        # Save to database
-        if not db.set_user_house(vars.username, house_obj):
+        # Save to database (same transaction fetches the id/temp/weather below)
+        state = db.set_user_house_bootstrap(vars.username, house_obj)
+        if state is None:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Initialize simulated indoor temp if this is first house submission
-        _initialize_simulation_temp(vars.username)
+        _initialize_simulation_temp(state)
 
         return {"status": "ok", "saved": "db"}
 
@@ -63,22 +66,20 @@ def save_house_variables(vars: HouseVariables):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _initialize_simulation_temp(username: str) -> None:
+def _initialize_simulation_temp(state: dict) -> None:
     """
     Initialize simulated indoor temperature on first house submission.
     Uses the first weather row's temperature or a default value.
-    """
-    user_id = db.get_user_id(username)
-    if user_id is None:
-        return
 
+    `state` is the dict returned by db.set_user_house_bootstrap.
+    """
     # Skip if already initialized
-    if db.get_simulated_temp(user_id) is not None:
+    if state["simulated_temp"] is not None:
         return
 
     # Try to get initial temp from weather data
     initial_temp = 70.0  # Default
-    raw_weather = db.get_user_weather(username)
+    raw_weather = state["weather"]
 
     weather_rows = None
     if isinstance(raw_weather, dict):
@@ -94,4 +95,4 @@ def _initialize_simulation_temp(username: str) -> None:
             except (ValueError, TypeError):
                 pass
 
-    db.update_simulated_temp(user_id, initial_temp)
+    db.update_simulated_temp(state["id"], initial_temp)
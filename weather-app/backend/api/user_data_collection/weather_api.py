@@ -3,23 +3,37 @@ Weather API Module
 Fetches weather data from Open-Meteo API and provides endpoints for weather data.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+import asyncio
+import functools
+import hashlib
+import threading
+import time
 import zoneinfo
 
+import numpy as np
 import pandas as pd
 import openmeteo_requests
 import requests_cache
 from retry_requests import retry
 
+# ── optional orjson import ───────────────────────────────────────────────────
+try:
+    import orjson  # noqa: F401
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
 # ============================================================
 # Constants
 # ============================================================
 
 DEFAULT_TIMEZONE = "America/Toronto"
 CACHE_EXPIRY_SECONDS = 3600
+CLIENT_MAX_AGE_SECONDS = 600
 OPENMETEO_URL = "https://api.open-meteo.com/v1/forecast"
 
 HOURLY_VARIABLES = [
@@ -33,37 +47,133 @@ HOURLY_VARIABLES = [
     "snowfall",
     "windspeed_10m",
 ]
+_HOURLY_PARAM = ",".join(HOURLY_VARIABLES)
+
+# Weather payloads are ~170 rows × 10 fields: encode them with orjson when
+# installed (stdlib json otherwise)
+WEATHER_RESPONSE_CLASS = ORJSONResponse if _ORJSON_AVAILABLE else JSONResponse
+
+# Post-processed responses, keyed by (lat, lon rounded to ~100 m, tz,
+# days_ahead, local date); entries expire after CACHE_EXPIRY_SECONDS
+_WEATHER_MEMO_MAX = 256
+_weather_memo: dict[tuple, tuple[float, dict]] = {}
+
+# Memo-entry keys that are only handed out on request (the text header is
+# internal); everything else is copied into each response
+_MEMO_VIEWS = ("columns", "rows", "text", "text_header", "etag")
+
+# Shared Open-Meteo client (cached + retrying session), built on first use
+_client = None
+_client_lock = threading.Lock()
 
 # ============================================================
 # Weather Fetching
 # ============================================================
 
+def _get_client() -> openmeteo_requests.Client:
+    """Return the shared Open-Meteo client, building it once.
+
+    The HTTP cache file is opened once per process instead of per call; its
+    SQLite backend keeps a connection per thread, so sharing is safe.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cache_session = requests_cache.CachedSession(".cache", expire_after=CACHE_EXPIRY_SECONDS)
+                retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+                _client = openmeteo_requests.Client(session=retry_session)
+    return _client
+
+
+@functools.lru_cache(maxsize=32)
+def _zone(tz_name: str) -> zoneinfo.ZoneInfo:
+    """ZoneInfo for `tz_name`, built once per name."""
+    return zoneinfo.ZoneInfo(tz_name)
+
+
 def fetch_and_export_weather(
     lat: float,
     lon: float,
     tz_name: str = DEFAULT_TIMEZONE,
     days_ahead: int = 7,
+    columnar: bool = False,
+    include_text: bool = False,
 ) -> dict:
     """
     Fetch hourly weather for the next `days_ahead` days (including today).
     
     Returns:
         Dict containing:
-        - rows: list of hourly weather data
-        - text: formatted text representation
+        - rows: list of hourly weather data, or with `columnar=True`
+          columns: {field: list of hourly values} (same data, one list per field)
+        - text: formatted text table (only with `include_text=True`)
         - lat, lon: coordinates
         - start_date, end_date_exclusive: date range
+
+    Results are memoised in-process for CACHE_EXPIRY_SECONDS per location
+    and local date, so repeat calls skip the fetch and all post-processing.
     """
-    # Setup cached session with retry
-    cache_session = requests_cache.CachedSession(".cache", expire_after=CACHE_EXPIRY_SECONDS)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    client = openmeteo_requests.Client(session=retry_session)
+    result = _memo_weather(lat, lon, tz_name, days_ahead)
+    return _weather_view(result, columnar, include_text)
+
+
+def _memo_weather(lat: float, lon: float, tz_name: str, days_ahead: int) -> dict:
+    """Memoised _fetch_weather result for this location and local date."""
+    today = datetime.now(timezone.utc).astimezone(_zone(tz_name)).date()
+    key = (round(lat, 3), round(lon, 3), tz_name, days_ahead, today.isoformat())
+    now = time.monotonic()
+
+    cached = _weather_memo.get(key)
+    if cached is not None and now - cached[0] < CACHE_EXPIRY_SECONDS:
+        result = cached[1]
+    else:
+        result = _fetch_weather(lat, lon, tz_name, days_ahead)
+        if len(_weather_memo) >= _WEATHER_MEMO_MAX:
+            _weather_memo.pop(next(iter(_weather_memo)))
+        _weather_memo[key] = (now, result)
+    return result
+
+
+def _weather_view(result: dict, columnar: bool, include_text: bool) -> dict:
+    """Response dict for a memoised result (fresh top level; lists shared)."""
+    if columnar:
+        out = {"columns": result["columns"]}
+    else:
+        out = {"rows": _memo_rows(result)}
+    if include_text:
+        out["text"] = _memo_text(result)
+    out.update((k, v) for k, v in result.items() if k not in _MEMO_VIEWS)
+    return out
+
+
+def _memo_rows(result: dict) -> list:
+    """Row-per-hour view of a memoised result's columns, built on first use."""
+    rows = result.get("rows")
+    if rows is None:
+        columns = result["columns"]
+        keys = list(columns)
+        rows = result["rows"] = [dict(zip(keys, row)) for row in zip(*columns.values())]
+    return rows
+
+
+def _memo_text(result: dict) -> str:
+    """Text-table view of a memoised result's columns, built on first use."""
+    text = result.get("text")
+    if text is None:
+        text = result["text"] = result["text_header"] + _format_table(result["columns"])
+    return text
+
+
+def _fetch_weather(lat: float, lon: float, tz_name: str, days_ahead: int) -> dict:
+    """Fetch and post-process the Open-Meteo hourly forecast (uncached)."""
+    client = _get_client()
 
     # Fetch weather data
     params = {
         "latitude": lat,
         "longitude": lon,
-        "hourly": ",".join(HOURLY_VARIABLES),
+        "hourly": _HOURLY_PARAM,
         "timezone": tz_name,
     }
 
@@ -85,40 +195,64 @@ def fetch_and_export_weather(
         "windspeed_10m": variables(8).ValuesAsNumpy(),
     }
 
-    # Build time range
-    times_utc = pd.date_range(
-        start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-        end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-        freq=pd.Timedelta(seconds=hourly.Interval()),
-        inclusive="left",
-    )
-    times_local = times_utc.tz_convert(tz_name)
-
-    # Create DataFrame
-    df = pd.DataFrame({"date": times_local, **weather_vars})
-
     # Filter to requested date range
-    tz = zoneinfo.ZoneInfo(tz_name)
+    tz = _zone(tz_name)
     now_local = datetime.now(timezone.utc).astimezone(tz)
     today = now_local.date()
     today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=tz)
     range_end = today_start + timedelta(days=days_ahead)
 
-    range_df = df[(df["date"] >= today_start) & (df["date"] < range_end)].copy()
+    # The response is a regular grid: row i is at t0 + i·interval, so the
+    # rows in [today_start, range_end) are found by arithmetic alone
+    t0, interval = hourly.Time(), hourly.Interval()
+    n_rows = len(weather_vars["temperature_2m"])
+    i0 = _grid_index(today_start, t0, interval, n_rows)
+    i1 = max(i0, _grid_index(range_end, t0, interval, n_rows))
+    range_vars = {key: values[i0:i1] for key, values in weather_vars.items()}
+
+    # Local timestamps, formatted in one vectorised call
+    dates = (
+        pd.date_range(
+            start=pd.to_datetime(t0 + i0 * interval, unit="s", utc=True),
+            periods=i1 - i0,
+            freq=pd.Timedelta(seconds=interval),
+        )
+        .tz_convert(tz_name)
+        .strftime("%Y-%m-%d %H:%M:%S %Z")
+        .tolist()
+    )
 
-    # Build text representation
+    # Text representation header (the table itself is only formatted if a
+    # caller asks for include_text)
     header = (
         f"Hourly weather from {today_start.date()} through {(range_end - timedelta(days=1)).date()} "
         f"(inclusive)  -- lat={lat}, lon={lon}, tz={tz_name}\n"
     )
-    text_content = header + range_df.to_string(index=False)
 
-    # Convert to JSON-serializable rows
-    rows = [_row_to_dict(row) for _, row in range_df.iterrows()]
+    # Convert to JSON-serializable columns: each becomes a list of Python
+    # floats with NaN → None via one np.isnan mask (rows are zipped from these
+    # on demand).  Gap-free columns (the usual case) skip the object-array
+    # round trip.
+    columns = {"date": dates}
+    for key, values in range_vars.items():
+        nan_mask = np.isnan(values)
+        if not nan_mask.any():
+            columns[key] = values.tolist()
+            continue
+        boxed = values.astype(object)
+        boxed[nan_mask] = None
+        columns[key] = boxed.tolist()
+
+    # Content hash of the hourly values, so every worker hands out the same
+    # ETag for the same forecast and a new one as soon as Open-Meteo updates
+    digest = hashlib.blake2b(header.encode(), digest_size=8)
+    for values in range_vars.values():
+        digest.update(values.tobytes())
 
     return {
-        "rows": rows,
-        "text": text_content,
+        "columns": columns,
+        "text_header": header,
+        "etag": digest.hexdigest(),
         "lat": lat,
         "lon": lon,
         "start_date": today_start.date().isoformat(),
@@ -126,28 +260,22 @@ def fetch_and_export_weather(
     }
 
 
-def _row_to_dict(row: pd.Series) -> dict:
-    """Convert a DataFrame row to a JSON-serializable dict."""
-    def safe_float(v: Any) -> Optional[float]:
-        if pd.isna(v):
-            return None
-        try:
-            return float(v)
-        except Exception:
-            return v
+def _grid_index(moment: datetime, t0: int, interval: int, n_rows: int) -> int:
+    """Index of the first grid row at or after `moment`, clamped to [0, n_rows]."""
+    offset = int(moment.timestamp()) - t0
+    return min(n_rows, max(0, -(-offset // interval)))
 
-    return {
-        "date": row["date"].strftime("%Y-%m-%d %H:%M:%S %Z"),
-        "temperature_2m": safe_float(row["temperature_2m"]),
-        "apparent_temperature": safe_float(row["apparent_temperature"]),
-        "dew_point_2m": safe_float(row["dew_point_2m"]),
-        "humidity_2m": safe_float(row["humidity_2m"]),
-        "solar_radiation": safe_float(row["solar_radiation"]),
-        "precipitation": safe_float(row["precipitation"]),
-        "rain": safe_float(row["rain"]),
-        "snowfall": safe_float(row["snowfall"]),
-        "windspeed_10m": safe_float(row["windspeed_10m"]),
-    }
+
+def _format_table(columns: dict) -> str:
+    """Fixed-width text table: one line per hour, right-aligned columns."""
+    cells = {"date": columns["date"]}
+    for key, values in columns.items():
+        if key != "date":
+            cells[key] = ["NaN" if v is None else f"{v:.6f}" for v in values]
+    widths = {key: max([len(key), *map(len, col)]) for key, col in cells.items()}
+    lines = ["  ".join(key.rjust(widths[key]) for key in cells)]
+    lines += ["  ".join(v.rjust(widths[k]) for k, v in zip(cells, row)) for row in zip(*cells.values())]
+    return "\n".join(lines)
 
 
 # ============================================================
@@ -162,10 +290,39 @@ class Coord(BaseModel):
     lon: float
 
 
-@router.post("/weather")
-def get_weather(coord: Coord):
-    """Fetch weather data for given coordinates."""
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value covers `etag` (weak tags too)."""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.post("/weather", response_class=WEATHER_RESPONSE_CLASS)
+async def get_weather(
+    coord: Coord,
+    request: Request,
+    columnar: bool = False,
+    include_text: bool = False,
+):
+    """
+    Fetch weather data for given coordinates.
+
+    Query params:
+        columnar: Return `columns` (one list per field) instead of `rows`
+        include_text: Also return the fixed-width `text` table
+
+    Responses carry an ETag; a request whose If-None-Match still matches
+    gets an empty 304 instead of the full payload.
+    """
     try:
-        return fetch_and_export_weather(coord.lat, coord.lon)
+        # The Open-Meteo client is synchronous; run it off the event loop
+        result = await asyncio.to_thread(_memo_weather, coord.lat, coord.lon, DEFAULT_TIMEZONE, 7)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    # The layout flags change the body, so they are part of the tag
+    etag = f'"{result["etag"]}-{int(columnar)}{int(include_text)}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={CLIENT_MAX_AGE_SECONDS}"}
+
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return WEATHER_RESPONSE_CLASS(_weather_view(result, columnar, include_text), headers=headers)
@@ -3,12 +3,23 @@ Weather App Backend Server
 FastAPI application with CORS support for the weather simulation app.
 """
 
+import asyncio
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from typing import List
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from dotenv import load_dotenv
 
+# ── optional orjson import ───────────────────────────────────────────────────
+try:
+    import orjson  # noqa: F401
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
@@ -20,12 +31,18 @@ from api.authentication.auth_api import router as auth_router
 from api.alerts_simulation.alerts import router as alerts_router
 from api.hvac_simulation.indoor_temp_simulation import (
     run_simulation_step,
+    run_simulation_step_batch,
+    BATCH_MAX_USERS,
     run_hvac_ai,
     run_simulation_step_with_hvac,
     update_target_setpoint,
     get_current_setpoint,
-    get_hvac_schedule_summary
+    get_hvac_schedule_summary,
+    get_indoor_forecast,
 )
+from api.hvac_simulation.kernels import warm_kernels
+from database import db
+from api.user_data_collection.address_to_latlon import start_async_client, close_async_client
 
 # ============================================================
 # Configuration
@@ -39,10 +56,42 @@ ALLOWED_ORIGINS = ["http://localhost:3000", "http://localhost:5173", "http://fro
 # App Setup
 # ============================================================
 
+async def _snapshot_loop():
+    """Periodically persist buffered simulated temperatures, so the last
+    values of users who stop polling reach the DB without waiting for shutdown."""
+    while True:
+        await asyncio.sleep(db.SIM_TEMP_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(db.flush_simulated_temps)
+        except Exception as e:
+            print(f"Snapshot Error: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm everything the first request would otherwise pay for, then tear down."""
+    # Load/compile the Numba RC kernels and open the DB connection pool
+    await asyncio.to_thread(warm_kernels)
+    await asyncio.to_thread(db.open_pool)
+    # Shared async HTTP client and the simulated-temperature snapshot loop
+    start_async_client()
+    snapshot_task = asyncio.create_task(_snapshot_loop())
+    try:
+        yield
+    finally:
+        # Stop the snapshot loop and persist whatever is still buffered
+        snapshot_task.cancel()
+        db.flush_simulated_temps()
+        await close_async_client()
+
+
 app = FastAPI(
     title="Weather App API",
     description="Backend API for weather simulation and HVAC management",
     version="1.0.0",
+    # orjson-encoded responses for every route (stdlib json without orjson)
+    default_response_class=ORJSONResponse if _ORJSON_AVAILABLE else JSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -53,15 +102,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
 # ============================================================
 # Routes
 # ============================================================
+# Handlers are async and push the blocking simulation/DB work onto worker
+# threads with asyncio.to_thread, so the event loop stays free for I/O.
 
 @app.get("/api/simulation/{username}")
-def get_simulation_step(username: str):
+async def get_simulation_step(username: str):
     """Run one simulation step for the given user."""
     try:
-        result = run_simulation_step_with_hvac(username)
+        result = await asyncio.to_thread(run_simulation_step_with_hvac, username)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -72,8 +124,46 @@ def get_simulation_step(username: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/simulation/batch")
+async def post_simulation_batch(usernames: List[str] = Body(...)):
+    """
+    Run one physics-only simulation step for many users at once.
+
+    Body: JSON list of at most BATCH_MAX_USERS usernames.  Per-user
+    failures are reported inline as {"error": ...} instead of failing the
+    whole batch.
+    """
+    if len(usernames) > BATCH_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_USERS} usernames per batch")
+    try:
+        return await asyncio.to_thread(run_simulation_step_batch, usernames)
+    except Exception as e:
+        print(f"Batch Simulation Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/forecast/{username}")
+async def get_forecast(username: str, hours: int = 24):
+    """
+    Forecast indoor temperature hour by hour with the HVAC off.
+
+    Query params:
+        hours: Forecast horizon in hours (1-168, default 24)
+    """
+    try:
+        result = await asyncio.to_thread(get_indoor_forecast, username, hours=hours)
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Forecast Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/hvac/{username}")
-def get_hvac_schedule(username: str, target_temp: float = None):
+async def get_hvac_schedule(username: str, target_temp: float = None):
     """
     Generate and return the HVAC AI schedule for the given user.
     
@@ -81,7 +171,7 @@ def get_hvac_schedule(username: str, target_temp: float = None):
         target_temp: Desired temperature setpoint in Celsius (optional - uses saved value if not provided)
     """
     try:
-        result = run_hvac_ai(username, target_temp_c=target_temp)
+        result = await asyncio.to_thread(run_hvac_ai, username, target_temp_c=target_temp)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -93,12 +183,12 @@ def get_hvac_schedule(username: str, target_temp: float = None):
 
 
 @app.post("/api/hvac/{username}/refresh")
-def refresh_hvac_schedule(username: str, target_temp: float = None):
+async def refresh_hvac_schedule(username: str, target_temp: float = None):
     """
     Force regenerate the HVAC schedule (useful after weather/house data changes).
     """
     try:
-        result = run_hvac_ai(username, target_temp_c=target_temp)
+        result = await asyncio.to_thread(run_hvac_ai, username, target_temp_c=target_temp)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -110,7 +200,7 @@ def refresh_hvac_schedule(username: str, target_temp: float = None):
 
 
 @app.post("/api/setpoint/{username}")
-def set_thermostat_setpoint(username: str, target_temp: float):
+async def set_thermostat_setpoint(username: str, target_temp: float):
     """
     Update the user's target temperature setpoint.
     Called when user adjusts the thermostat.
@@ -119,7 +209,7 @@ def set_thermostat_setpoint(username: str, target_temp: float):
         target_temp: New target temperature in Celsius
     """
     try:
-        result = update_target_setpoint(username, target_temp)
+        result = await asyncio.to_thread(update_target_setpoint, username, target_temp)
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         return result
@@ -131,12 +221,12 @@ def set_thermostat_setpoint(username: str, target_temp: float):
 
 
 @app.get("/api/setpoint/{username}")
-def get_thermostat_setpoint(username: str):
+async def get_thermostat_setpoint(username: str):
     """
     Get the user's current target temperature setpoint.
     """
     try:
-        result = get_current_setpoint(username)
+        result = await asyncio.to_thread(get_current_setpoint, username)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -148,12 +238,12 @@ def get_thermostat_setpoint(username: str):
 
 
 @app.get("/api/hvac/{username}/summary")
-def get_hvac_summary(username: str):
+async def get_hvac_summary(username: str):
     """
     Get a summary of the current HVAC schedule.
     """
     try:
-        result = get_hvac_schedule_summary(username)
+        result = await asyncio.to_thread(get_hvac_schedule_summary, username)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
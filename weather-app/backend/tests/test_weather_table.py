@@ -0,0 +1,34 @@
+"""
+Tests for the per-user columnar weather cache in indoor_temp_simulation.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.hvac_simulation import indoor_temp_simulation as sim
+
+
+def _rows(temps):
+    return [
+        {"date": f"2025-12-19 {h:02d}:00:00 EST", "temperature_2m": t}
+        for h, t in enumerate(temps)
+    ]
+
+
+def setup_function(_):
+    sim._weather_tables.clear()
+
+
+def test_same_dates_different_values_do_not_collide():
+    rows_a = _rows([1.0, 2.0, 3.0])
+    rows_b = _rows([11.0, 12.0, 13.0])
+
+    assert sim._weather_values(1, rows_a, 1)["t_out"] == 2.0
+    assert sim._weather_values(2, rows_b, 1)["t_out"] == 12.0
+
+
+def test_revised_rows_rebuild_the_table():
+    assert sim._weather_values(1, _rows([1.0, 2.0, 3.0]), 0)["t_out"] == 1.0
+    assert sim._weather_values(1, _rows([5.0, 2.0, 3.0]), 0)["t_out"] == 5.0
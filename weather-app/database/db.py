@@ -4,135 +4,552 @@ SQLite database operations for user management and data storage.
 """
 
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from datetime import datetime, timezone
+import asyncio
+import atexit
+import os
+import queue
 import sqlite3
+import threading
+import time
 import hashlib
 import secrets
 import json
 from typing import Any, Optional
 
+# ── optional orjson import ───────────────────────────────────────────────────
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+# ── optional fastpbkdf2 import (not in requirements: needs a C toolchain) ────
+try:
+    from fastpbkdf2 import pbkdf2_hmac as _pbkdf2_hmac
+    _FASTPBKDF2_AVAILABLE = True
+except ImportError:
+    _pbkdf2_hmac = hashlib.pbkdf2_hmac
+    _FASTPBKDF2_AVAILABLE = False
+
 # ============================================================
 # Configuration
 # ============================================================
 
 DB_PATH = Path(__file__).parent / "users.db"
-PBKDF2_ITERATIONS = 200_000
+PBKDF2_ITERATIONS = 200_000    # legacy hashes only; upgraded on next login
+
+# scrypt cost for new password hashes: 128 * N * r bytes (16 MiB) of memory
+# and ~50 ms per hash.  Stored with the hash, so raising these later makes
+# verify_user upgrade existing hashes as users log in.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Successful logins are remembered for this long, so a client re-verifying
+# the same credentials skips the KDF run (see verify_user)
+VERIFY_CACHE_TTL_SECONDS = 60
+
+# Write-behind for simulated temperatures: buffered rows are flushed in one
+# transaction once this many are pending or this many seconds have passed
+# (the app also snapshots on that interval while idle, and on shutdown)
+SIM_TEMP_FLUSH_ROWS = int(os.environ.get("SIM_TEMP_FLUSH_ROWS", 64))
+SIM_TEMP_FLUSH_SECONDS = float(os.environ.get("SIM_TEMP_FLUSH_SECONDS", 5.0))
 
 # ============================================================
 # Database Connection Management
 # ============================================================
 
+# Small pool of persistent connections shared by all threads: opening a
+# connection (file open, schema parse, PRAGMAs) costs more than most of the
+# queries run on it, and each keeps its page cache warm between calls.
+# One connection is the writer, used by one transaction at a time (SQLite
+# allows a single writer anyway; taking turns here avoids SQLITE_BUSY
+# retries); the other POOL_SIZE - 1 are read-only.
+POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", 4))
+
+_pool: Optional[queue.LifoQueue] = None    # read-only connections
+_pool_path: Optional[Path] = None
+_pool_lock = threading.Lock()
+_writer: Optional[sqlite3.Connection] = None
+_writer_lock = threading.Lock()
+
+# username → id and username → address never change once the user exists
+# (there is no rename/delete/address update), so hits are cached per database
+# for the life of the process, least recently used evicted first.  Misses are
+# not cached: the name may be signed up a moment later.
+_USER_CACHE_MAX = 4096
+_user_id_cache: dict[str, int] = {}
+_user_address_cache: dict[str, Optional[str]] = {}
+
+
+# Per-connection settings, applied once when a pooled connection is opened.
+# WAL + synchronous=NORMAL: commits append to the WAL without an fsync each
+# (durable at checkpoint); readers never block the writer.
+_CONNECTION_PRAGMAS = """
+    PRAGMA foreign_keys = ON;
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -64000;
+    PRAGMA mmap_size = 268435456;
+"""
+
+
+def _connect(read_only: bool = False) -> sqlite3.Connection:
+    """Open and configure a new connection to DB_PATH."""
+    # Plain tuple rows: most reads take one column, so no sqlite3.Row per
+    # fetch; the wide composite queries ask for Row via _row_cursor
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.executescript(_CONNECTION_PRAGMAS)
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def _row_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor whose rows are sqlite3.Row, addressable by column name."""
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    return cur
+
+
+def _get_pool() -> queue.LifoQueue:
+    """Return the reader pool, (re)building it and the writer if DB_PATH changed."""
+    global _pool, _pool_path, _writer
+    if _pool is None or _pool_path != DB_PATH:
+        with _pool_lock:
+            if _pool is None or _pool_path != DB_PATH:
+                old, old_writer = _pool, _writer
+                DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+                writer = _connect()    # first: it switches the file to WAL
+                # Schema and migrations, once, before any query can run
+                _ensure_schema(writer)
+                writer.commit()
+                pool = queue.LifoQueue()
+                for _ in range(max(1, POOL_SIZE - 1)):
+                    pool.put(_connect(read_only=True))
+                _pool, _pool_path, _writer = pool, DB_PATH, writer
+                _user_id_cache.clear()    # both belong to the old database
+                _user_address_cache.clear()
+                while old is not None and not old.empty():
+                    old.get_nowait().close()
+                if old_writer is not None:
+                    with _writer_lock:
+                        old_writer.close()
+    return _pool
+
+
+def open_pool() -> None:
+    """Open the connection pool (creating/migrating the schema) now instead of on the first query."""
+    _get_pool()
+
+
 @contextmanager
-def get_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+def get_connection(write: bool = False):
+    """Context manager lending a pooled connection for one transaction.
+
+    Commits on success and rolls back on error, then returns the connection
+    to the pool (blocking while all readers are lent out).  Pass write=True
+    for anything that modifies the database: it gets the writer connection,
+    waiting for the transaction currently holding it.
+    """
+    pool = _get_pool()
+    if write:
+        _writer_lock.acquire()
+        conn = _writer
+    else:
+        conn = pool.get()
     try:
         yield conn
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
     finally:
-        conn.close()
+        if write:
+            _writer_lock.release()
+        else:
+            pool.put(conn)
+
+
+# Current schema, created in one script.  Weather snapshots are one row per
+# user and date (the primary key also serves the "latest snapshot" lookup),
+# instead of one ever-growing JSON array in users.user_weather.
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash BLOB NOT NULL,
+        salt BLOB NOT NULL,
+        address TEXT,
+        user_weather BLOB,
+        user_house BLOB,
+        weather_date TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS user_thermostat (
+        user_id INTEGER PRIMARY KEY,
+        sim_inside_temp REAL NOT NULL,
+        hvac_sim BLOB,
+        target_setpoint REAL DEFAULT NULL,
+        appliance_alerts BLOB,
+        last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    );
+    
+    CREATE TABLE IF NOT EXISTS user_weather_snapshot (
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        data BLOB,
+        PRIMARY KEY (user_id, date),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    );
+"""
+
 
+# Stored in the database header (PRAGMA user_version).  Bump it together
+# with a new _migrate_vN step; databases already at this version skip
+# schema creation and migrations entirely.
+SCHEMA_VERSION = 1
 
-def _ensure_schema():
-    """Create database schema if it doesn't exist."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create/migrate the schema if it is older than SCHEMA_VERSION (called by _get_pool).
+
+    Everything runs in one write transaction, which the caller commits.
+    """
+    cur = conn.cursor()
     
-    with get_connection() as conn:
-        cur = conn.cursor()
-        
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL,
-                address TEXT,
-                user_weather TEXT,
-                user_house TEXT,
-                weather_date TEXT
-            )
-        """)
-        
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_weather_snapshot'")
+    had_snapshot_table = cur.fetchone() is not None
+    
+    # The script leaves the transaction open for the migrations below
+    conn.executescript("BEGIN IMMEDIATE;" + _SCHEMA_SQL)
+    
+    if version < 1:
+        _migrate_v1(cur, had_snapshot_table)
+    
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _migrate_v1(cur: sqlite3.Cursor, had_snapshot_table: bool) -> None:
+    """Bring a pre-versioning database (user_version 0) up to the v1 layout.
+
+    Every step is idempotent, so it is also safe on a freshly created file.
+    """
+    if not had_snapshot_table:
+        _migrate_weather_snapshots(cur)
+    
+    # Add target_setpoint column if it doesn't exist (migration for existing DBs)
+    try:
+        cur.execute("ALTER TABLE user_thermostat ADD COLUMN target_setpoint REAL DEFAULT NULL")
+    except:
+        pass  # Column already exists
+    
+    # Add appliance_alerts column if it doesn't exist (migration for existing DBs)
+    try:
+        cur.execute("ALTER TABLE user_thermostat ADD COLUMN appliance_alerts BLOB")
+    except:
+        pass  # Column already exists
+    
+    # JSON columns are written as UTF-8 bytes (BLOB); convert values still
+    # stored as TEXT so reads see one representation (no-op once done)
+    for table, column in (
+        ("users", "user_weather"),
+        ("users", "user_house"),
+        ("user_thermostat", "hvac_sim"),
+        ("user_thermostat", "appliance_alerts"),
+    ):
+        cur.execute(
+            f"UPDATE {table} SET {column} = CAST({column} AS BLOB) WHERE typeof({column}) = 'text'"
+        )
+    
+    # Password hash/salt are raw bytes; rewrite rows still holding hex
+    cur.execute("SELECT id, password_hash, salt FROM users WHERE typeof(password_hash) = 'text'")
+    legacy = [
+        (bytes.fromhex(pw_hash), bytes.fromhex(salt), user_id)
+        for user_id, pw_hash, salt in cur.fetchall()
+    ]
+    if legacy:
+        cur.executemany("UPDATE users SET password_hash = ?, salt = ? WHERE id = ?", legacy)
+    
+    # Clear old default 22.0 setpoints to allow personal_comfort fallback
+    # Only clear if user hasn't manually adjusted (sim_inside_temp would be exactly 22.0 too)
+    try:
         cur.execute("""
-            CREATE TABLE IF NOT EXISTS user_thermostat (
-                user_id INTEGER PRIMARY KEY,
-                sim_inside_temp REAL NOT NULL,
-                hvac_sim TEXT,
-                target_setpoint REAL DEFAULT NULL,
-                appliance_alerts TEXT,
-                last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
+            UPDATE user_thermostat 
+            SET target_setpoint = NULL 
+            WHERE target_setpoint = 22.0 
+            AND (sim_inside_temp IS NULL OR sim_inside_temp = 22.0 OR sim_inside_temp = 20.0)
         """)
-        
-        # Add target_setpoint column if it doesn't exist (migration for existing DBs)
-        try:
-            cur.execute("ALTER TABLE user_thermostat ADD COLUMN target_setpoint REAL DEFAULT NULL")
-        except:
-            pass  # Column already exists
-        
-        # Add appliance_alerts column if it doesn't exist (migration for existing DBs)
-        try:
-            cur.execute("ALTER TABLE user_thermostat ADD COLUMN appliance_alerts TEXT")
-        except:
-            pass  # Column already exists
-        
-        # Clear old default 22.0 setpoints to allow personal_comfort fallback
-        # Only clear if user hasn't manually adjusted (sim_inside_temp would be exactly 22.0 too)
-        try:
-            cur.execute("""
-                UPDATE user_thermostat 
-                SET target_setpoint = NULL 
-                WHERE target_setpoint = 22.0 
-                AND (sim_inside_temp IS NULL OR sim_inside_temp = 22.0 OR sim_inside_temp = 20.0)
-            """)
-        except:
-            pass
+    except:
+        pass
+
+
+def _migrate_weather_snapshots(cur: sqlite3.Cursor) -> None:
+    """Move snapshot lists stored in users.user_weather into their own table."""
+    cur.execute("SELECT id, user_weather FROM users WHERE user_weather IS NOT NULL")
+    for user_id, user_weather in cur.fetchall():
+        stored = _from_json(user_weather)
+        if not isinstance(stored, list):
+            continue
+        snapshots = [
+            (user_id, entry["date"], _dumps(entry["data"]))
+            for entry in stored
+            if isinstance(entry, dict) and "date" in entry and "data" in entry
+        ]
+        if not snapshots:
+            continue
+        cur.executemany(_SQL_PUT_SNAPSHOT, snapshots)
+        # Entries that didn't fit the snapshot shape stay in user_weather
+        if len(snapshots) == len(stored):
+            cur.execute("UPDATE users SET user_weather = NULL WHERE id = ?", (user_id,))
 
 
-# Initialize schema on module import
-_ensure_schema()
+# ============================================================
+# SQL Statements
+# ============================================================
+# Every runtime query is a module constant: call sites pass the same string
+# object each time, so it is a cheap hit in each connection's compiled-
+# statement cache (cached_statements in _connect), nothing rebuilt per call.
+
+# Users
+_SQL_USER_ID = "SELECT id FROM users WHERE username = ?"
+_SQL_USER_CREDENTIALS = "SELECT password_hash, salt FROM users WHERE username = ?"
+_SQL_USER_ADDRESS = "SELECT address FROM users WHERE username = ?"
+_SQL_INSERT_USER = "INSERT INTO users (username, password_hash, salt, address) VALUES (?, ?, ?, ?)"
+# Only if the hash is still the one just verified (no concurrent change)
+_SQL_UPGRADE_PASSWORD = "UPDATE users SET password_hash = ?, salt = ? WHERE username = ? AND password_hash = ?"
+
+# Weather
+_SQL_SET_USER_WEATHER = "UPDATE users SET user_weather = ? WHERE username = ? RETURNING id"
+_SQL_USER_WEATHER = "SELECT user_weather FROM users WHERE username = ?"
+_SQL_SET_WEATHER_DATE = "UPDATE users SET weather_date = ? WHERE username = ? RETURNING id"
+_SQL_WEATHER_DATE = "SELECT weather_date FROM users WHERE username = ?"
+_SQL_PUT_SNAPSHOT = "INSERT OR REPLACE INTO user_weather_snapshot (user_id, date, data) VALUES (?, ?, ?)"
+_SQL_DELETE_SNAPSHOTS = "DELETE FROM user_weather_snapshot WHERE user_id = ?"
+_SQL_SNAPSHOTS = """
+    SELECT s.date, s.data
+    FROM user_weather_snapshot s
+    JOIN users u ON u.id = s.user_id
+    WHERE u.username = ?
+    ORDER BY s.date DESC
+    LIMIT ?
+"""
+
+# Joins each user's most recent snapshot (if any) as s.date / s.data
+_SQL_JOIN_LATEST_SNAPSHOT = """
+    LEFT JOIN user_weather_snapshot s ON s.rowid = (
+        SELECT rowid FROM user_weather_snapshot
+        WHERE user_id = u.id ORDER BY date DESC LIMIT 1
+    )
+"""
+
+# House
+_SQL_SET_USER_HOUSE = "UPDATE users SET user_house = ? WHERE username = ?"
+_SQL_SET_USER_HOUSE_RETURNING_ID = "UPDATE users SET user_house = ? WHERE username = ? RETURNING id"
+_SQL_USER_HOUSE = "SELECT user_house FROM users WHERE username = ?"
+
+# Thermostat
+_SQL_SIM_TEMP = "SELECT sim_inside_temp FROM user_thermostat WHERE user_id = ?"
+_SQL_LAST_UPDATED = "SELECT last_updated FROM user_thermostat WHERE user_id = ?"
+_SQL_UPSERT_SIM_TEMP = """
+    INSERT INTO user_thermostat (user_id, sim_inside_temp, last_updated)
+    VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        sim_inside_temp = excluded.sim_inside_temp,
+        last_updated = excluded.last_updated
+"""
+_SQL_HVAC_SIM = "SELECT hvac_sim FROM user_thermostat WHERE user_id = ?"
+_SQL_SET_HVAC_SIM = "UPDATE user_thermostat SET hvac_sim = ?, last_updated = CURRENT_TIMESTAMP WHERE user_id = ?"
+_SQL_TARGET_SETPOINT = "SELECT target_setpoint FROM user_thermostat WHERE user_id = ?"
+_SQL_SET_TARGET_SETPOINT = """
+    UPDATE user_thermostat 
+    SET target_setpoint = ?, last_updated = CURRENT_TIMESTAMP
+    WHERE user_id = ?
+"""
+# New record: 20.0 as default indoor temp (will be updated by simulation)
+_SQL_INSERT_TARGET_SETPOINT = """
+    INSERT INTO user_thermostat (user_id, sim_inside_temp, target_setpoint, last_updated)
+    VALUES (?, 20.0, ?, CURRENT_TIMESTAMP)
+"""
+_SQL_APPLIANCE_ALERTS = "SELECT appliance_alerts FROM user_thermostat WHERE user_id = ?"
+_SQL_SET_APPLIANCE_ALERTS = "UPDATE user_thermostat SET appliance_alerts = ?, last_updated = CURRENT_TIMESTAMP WHERE user_id = ?"
+
+# Composite
+_SQL_USER_STATE = """
+    SELECT u.id, u.address, u.user_house, u.user_weather, u.weather_date,
+           s.date AS snapshot_date, s.data AS snapshot_data,
+           t.sim_inside_temp, t.last_updated, t.hvac_sim,
+           t.target_setpoint, t.appliance_alerts
+    FROM users u
+    LEFT JOIN user_thermostat t ON t.user_id = u.id
+""" + _SQL_JOIN_LATEST_SNAPSHOT + """
+    WHERE u.username = ?
+"""
+_SQL_BOOTSTRAP_STATE = """
+    SELECT u.id, u.user_weather, t.sim_inside_temp,
+           s.date AS snapshot_date, s.data AS snapshot_data
+    FROM users u
+    LEFT JOIN user_thermostat t ON t.user_id = u.id
+""" + _SQL_JOIN_LATEST_SNAPSHOT + """
+    WHERE u.id = ?
+"""
+
+
+# ============================================================
+# Single-Value Lookups
+# ============================================================
+# Most getters are "one key in, first column of one row out".  Each gets a
+# function from _scalar_query with its SQL bound in a closure, instead of
+# repeating the connection/execute/fetch boilerplate.
+
+_MISS = object()
+
+
+def _scalar_query(sql: str, missing: Any = None):
+    """Build key -> first column of `sql`'s first row (`missing` if no row)."""
+    def query(key: Any) -> Any:
+        with get_connection() as conn:
+            row = conn.execute(sql, (key,)).fetchone()
+        return missing if row is None else row[0]
+    return query
+
+
+# `missing=_MISS` where a NULL column must be told apart from an absent row
+_fetch_user_id          = _scalar_query(_SQL_USER_ID)
+_fetch_user_address     = _scalar_query(_SQL_USER_ADDRESS, missing=_MISS)
+_fetch_weather_date     = _scalar_query(_SQL_WEATHER_DATE)
+_fetch_user_house       = _scalar_query(_SQL_USER_HOUSE)
+_fetch_sim_temp         = _scalar_query(_SQL_SIM_TEMP)
+_fetch_last_updated     = _scalar_query(_SQL_LAST_UPDATED)
+_fetch_hvac_sim         = _scalar_query(_SQL_HVAC_SIM)
+_fetch_target_setpoint  = _scalar_query(_SQL_TARGET_SETPOINT)
+_fetch_appliance_alerts = _scalar_query(_SQL_APPLIANCE_ALERTS)
+
 
 # ============================================================
 # Password Utilities
 # ============================================================
 
-def _hash_password(password: str, salt: bytes = None) -> tuple[str, str]:
-    """Hash a password using PBKDF2-SHA256."""
+# New hashes are b"scrypt$N$r$p$" + 32-byte key; a bare 32-byte value is a
+# legacy PBKDF2-SHA256 hash.
+_SCRYPT_PREFIX = b"scrypt$"
+
+
+def _hash_password(password: str, salt: bytes = None) -> tuple[bytes, bytes]:
+    """Hash a password using PBKDF2-SHA256 (legacy format). Returns raw (hash, salt) bytes."""
     if salt is None:
         salt = secrets.token_bytes(16)
     
-    hashed = hashlib.pbkdf2_hmac(
+    # fastpbkdf2 when installed (same signature and output as hashlib's)
+    hashed = _pbkdf2_hmac(
         "sha256",
         password.encode("utf-8"),
         salt,
-        PBKDF2_ITERATIONS
+        PBKDF2_ITERATIONS,
+        dklen=32,    # one SHA-256 block; stored hashes are 32 bytes
     )
-    return hashed.hex(), salt.hex()
+    return hashed, salt
+
+
+def _hash_password_v2(password: str, salt: bytes = None,
+                      params: tuple[int, int, int] = None) -> tuple[bytes, bytes]:
+    """Hash a password using scrypt (current SCRYPT_* unless `params` = (n, r, p)).
+
+    Returns raw (tagged hash, salt) bytes.
+    """
+    if salt is None:
+        salt = secrets.token_bytes(16)
+    n, r, p = params or (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    
+    hashed = hashlib.scrypt(
+        password.encode("utf-8"),
+        salt   = salt,
+        n      = n,
+        r      = r,
+        p      = p,
+        maxmem = 256 * n * r * p,    # scrypt needs 128 * N * r * p bytes
+        dklen  = 32,
+    )
+    return _SCRYPT_PREFIX + b"%d$%d$%d$" % (n, r, p) + hashed, salt
+
+
+def _check_password(password: str, stored_hash: bytes, salt: bytes) -> tuple[bool, bool]:
+    """Check a password against a stored hash of either format.
+
+    Returns (matches, needs_rehash): a match against a PBKDF2 hash, or a
+    scrypt hash with outdated parameters, should be re-hashed with
+    _hash_password_v2.
+    """
+    if stored_hash.startswith(_SCRYPT_PREFIX):
+        _, n, r, p, _ = stored_hash.split(b"$", 4)
+        params = (int(n), int(r), int(p))
+        computed, _ = _hash_password_v2(password, salt, params)
+        outdated = params != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    else:
+        computed, _ = _hash_password(password, salt)
+        outdated = True
+    
+    matches = secrets.compare_digest(computed, stored_hash)
+    return matches, matches and outdated
 
 
 # ============================================================
 # JSON Utilities
 # ============================================================
 
-def _to_json(data: Any) -> str:
-    """Convert data to JSON string."""
+# Non-str dict keys as json.dumps would write them; NumPy scalars/arrays
+# (simulation results) serialized natively instead of failing
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if _ORJSON_AVAILABLE else 0
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when installed, which emits them directly)."""
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass    # e.g. integers beyond 64 bits — stdlib handles those
+    return json.dumps(data).encode()
+
+
+def _loads(raw: Any) -> Any:
+    """Parse JSON text or bytes (orjson when installed)."""
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass    # stdlib also accepts the NaN/Infinity tokens json.dumps writes
+    return json.loads(raw)
+
+
+def _to_json(data: Any) -> bytes:
+    """Convert data to JSON bytes, stored as a BLOB (no str round trip)."""
     if isinstance(data, (dict, list)):
-        return json.dumps(data)
+        return _dumps(data)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
     try:
-        return json.dumps(json.loads(data))
+        _loads(data)    # validate only: valid JSON text is stored as sent
     except Exception:
-        return json.dumps({"text": str(data)})
+        return _dumps({"text": data.decode("utf-8", "replace") if isinstance(data, bytes) else str(data)})
+    return data
 
 
-def _from_json(raw: str) -> Any:
-    """Parse JSON string to Python object."""
+def _from_json(raw: Any) -> Any:
+    """Parse a JSON string or BLOB to Python object."""
     try:
-        return json.loads(raw)
+        return _loads(raw)
     except Exception:
-        return raw
+        return raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
 
 
 # ============================================================
@@ -141,127 +558,202 @@ def _from_json(raw: str) -> Any:
 
 def create_user(username: str, password: str, address: str = None) -> bool:
     """Create a new user. Returns False if username exists."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        
-        # Check if user exists
-        cur.execute("SELECT 1 FROM users WHERE username = ?", (username,))
-        if cur.fetchone():
+    if get_user_id(username) is not None:
+        return False
+
+    # Hash before opening the write connection so the KDF never holds the DB
+    pw_hash, salt = _hash_password_v2(password)
+    with get_connection(write=True) as conn:
+        # Check again: another signup may have taken the name meanwhile
+        if conn.execute(_SQL_USER_ID, (username,)).fetchone():
             return False
         
-        pw_hash, salt = _hash_password(password)
-        cur.execute(
-            "INSERT INTO users (username, password_hash, salt, address) VALUES (?, ?, ?, ?)",
-            (username, pw_hash, salt, address)
-        )
+        conn.execute(_SQL_INSERT_USER, (username, pw_hash, salt, address))
         return True
 
 
+# username → (fast digest of the verified password, stored hash it was
+# checked against, expiry).  The digest is keyed with a per-process secret
+# and the salt, so no plaintext or reusable hash is kept; tying entries to
+# the stored hash means a changed password never matches a stale entry.
+_VERIFY_CACHE_MAX = 1024
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
+_verify_cache: dict[str, tuple[bytes, Any, float]] = {}
+
+
+def _verify_digest(password: str, salt: Any) -> bytes:
+    """Cheap keyed digest used only for the in-process verification cache."""
+    salt_bytes = salt if isinstance(salt, bytes) else str(salt).encode()
+    return hashlib.sha3_256(_VERIFY_CACHE_KEY + salt_bytes + password.encode("utf-8")).digest()
+
+
 def verify_user(username: str, password: str) -> bool:
-    """Verify user credentials."""
+    """Verify user credentials.
+
+    A successful check is cached for VERIFY_CACHE_TTL_SECONDS; repeats
+    within that window cost one SHA3 instead of the full KDF.  Legacy
+    PBKDF2 hashes are replaced by scrypt ones on the first successful login.
+    """
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT password_hash, salt FROM users WHERE username = ?",
-            (username,)
-        )
-        row = cur.fetchone()
-        
-        if not row:
-            return False
-        
-        stored_hash = row[0]
-        salt = bytes.fromhex(row[1])
-        computed_hash, _ = _hash_password(password, salt=salt)
-        
-        return secrets.compare_digest(computed_hash, stored_hash)
+        row = conn.execute(_SQL_USER_CREDENTIALS, (username,)).fetchone()
+    
+    if not row:
+        return False
+    
+    stored_hash, salt = row[0], row[1]
+    digest = _verify_digest(password, salt)
+    cached = _verify_cache.get(username)
+    if (cached is not None and cached[1] == stored_hash and time.monotonic() < cached[2]
+            and secrets.compare_digest(cached[0], digest)):
+        return True
+    
+    # Connection is already back in the pool: the KDF runs without holding it
+    matches, needs_rehash = _check_password(password, stored_hash, salt)
+    if not matches:
+        return False
+    
+    if needs_rehash:
+        new_hash, new_salt = _hash_password_v2(password)
+        with get_connection(write=True) as conn:
+            upgraded = conn.execute(
+                _SQL_UPGRADE_PASSWORD, (new_hash, new_salt, username, stored_hash)
+            ).rowcount
+        if upgraded:
+            stored_hash, digest = new_hash, _verify_digest(password, new_salt)
+    
+    if len(_verify_cache) >= _VERIFY_CACHE_MAX:
+        _verify_cache.pop(next(iter(_verify_cache)), None)
+    _verify_cache[username] = (digest, stored_hash, time.monotonic() + VERIFY_CACHE_TTL_SECONDS)
+    return True
+
+
+# hashlib's KDFs release the GIL, so hashes on this pool run in parallel,
+# one per core.  Keeping them off asyncio's default executor means a login
+# burst can't starve the to_thread calls every other endpoint relies on.
+_KDF_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="kdf")
+
+
+async def create_user_async(username: str, password: str, address: str = None) -> bool:
+    """create_user on the password-hashing pool (for async callers)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_KDF_EXECUTOR, create_user, username, password, address)
+
+
+async def verify_user_async(username: str, password: str) -> bool:
+    """verify_user on the password-hashing pool (for async callers)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_KDF_EXECUTOR, verify_user, username, password)
+
+
+def _lru_get(cache: dict, key: str) -> Any:
+    """Return cache[key] and mark it most recently used (_MISS if absent)."""
+    try:
+        value = cache.pop(key)
+    except KeyError:
+        return _MISS
+    cache[key] = value
+    return value
+
+
+def _lru_put(cache: dict, key: str, value: Any) -> None:
+    """Insert into a user cache, evicting the least recently used entry when full."""
+    if len(cache) >= _USER_CACHE_MAX:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = value
 
 
 def get_user_id(username: str) -> Optional[int]:
     """Get user ID by username."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        return row[0] if row else None
+    user_id = _lru_get(_user_id_cache, username)
+    if user_id is not _MISS:
+        return user_id
+
+    user_id = _fetch_user_id(username)
+    if user_id is not None:
+        _lru_put(_user_id_cache, username, user_id)
+    return user_id
 
 
 def get_user_address(username: str) -> Optional[str]:
     """Get user's address."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT address FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        return row[0] if row else None
+    address = _lru_get(_user_address_cache, username)
+    if address is not _MISS:
+        return address
+
+    address = _fetch_user_address(username)
+    if address is _MISS:
+        return None
+
+    _lru_put(_user_address_cache, username, address)
+    return address
 
 
 # ============================================================
 # Weather Data
 # ============================================================
 
+def _stored_weather(row: sqlite3.Row) -> Optional[Any]:
+    """Weather for a row that joined _SQL_JOIN_LATEST_SNAPSHOT.
+
+    The latest snapshot comes back in the one-element snapshot-list shape
+    callers already unwrap; users without snapshots get user_weather.
+    """
+    if row["snapshot_data"] is not None:
+        return [{"date": row["snapshot_date"], "data": _from_json(row["snapshot_data"])}]
+    if row["user_weather"] is not None:
+        return _from_json(row["user_weather"])
+    return None
+
+
 def set_user_weather(username: str, data: Any) -> bool:
-    """Save weather data for a user."""
+    """Save weather data for a user (replacing any dated snapshots)."""
     payload = _to_json(data)
     
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE users SET user_weather = ? WHERE username = ?",
-            (payload, username)
-        )
-        return cur.rowcount > 0
+    with get_connection(write=True) as conn:
+        row = conn.execute(_SQL_SET_USER_WEATHER, (payload, username)).fetchone()
+        if row is None:
+            return False
+        conn.execute(_SQL_DELETE_SNAPSHOTS, (row[0],))
+        return True
+
 
+def get_user_weather(username: str, limit: Optional[int] = None) -> Optional[Any]:
+    """Get user's weather data.
 
-def get_user_weather(username: str) -> Optional[Any]:
-    """Get user's weather data."""
+    Users with dated snapshots get them as a list of {"date", "data"},
+    oldest first (only the newest `limit` if given).
+    """
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT user_weather FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
+        snapshots = conn.execute(_SQL_SNAPSHOTS, (username, -1 if limit is None else limit)).fetchall()
         
-        if not row or row[0] is None:
-            return None
-        
-        return _from_json(row[0])
+        if not snapshots:
+            row = conn.execute(_SQL_USER_WEATHER, (username,)).fetchone()
+            if not row or row[0] is None:
+                return None
+            return _from_json(row[0])
+    
+    return [{"date": date, "data": _from_json(data)} for date, data in reversed(snapshots)]
 
 
 def set_user_weather_with_date(username: str, data: Any, weather_date: str) -> bool:
-    """Save weather data with date tracking."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        
-        # Get existing weather data
-        cur.execute("SELECT user_weather FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        existing = row[0] if row else None
-        
-        # Parse existing snapshots
-        snapshots = []
-        if existing:
-            try:
-                parsed = json.loads(existing)
-                snapshots = parsed if isinstance(parsed, list) else [parsed]
-            except Exception:
-                snapshots = [{"text": existing}]
-        
-        # Add new snapshot
-        entry_data = data if isinstance(data, (dict, list)) else _from_json(data)
-        snapshots.append({"date": weather_date, "data": entry_data})
-        
-        cur.execute(
-            "UPDATE users SET user_weather = ?, weather_date = ? WHERE username = ?",
-            (json.dumps(snapshots), weather_date, username)
-        )
-        return cur.rowcount > 0
+    """Save weather data with date tracking.
+
+    Each call writes one snapshot row (replacing that date's, if any), so
+    the cost doesn't grow with the user's history.
+    """
+    payload = _to_json(data)    # JSON text arrives as-is, not parsed and re-dumped
+    
+    with get_connection(write=True) as conn:
+        row = conn.execute(_SQL_SET_WEATHER_DATE, (weather_date, username)).fetchone()
+        if row is None:
+            return False
+        conn.execute(_SQL_PUT_SNAPSHOT, (row[0], weather_date, payload))
+        return True
 
 
 def get_user_weather_date(username: str) -> Optional[str]:
     """Get the date of user's last weather update."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT weather_date FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        return row[0] if row else None
+    return _fetch_weather_date(username)
 
 
 # ============================================================
@@ -272,128 +764,151 @@ def set_user_house(username: str, data: Any) -> bool:
     """Save house variables for a user."""
     payload = _to_json(data)
     
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE users SET user_house = ? WHERE username = ?",
-            (payload, username)
-        )
-        return cur.rowcount > 0
+    with get_connection(write=True) as conn:
+        return conn.execute(_SQL_SET_USER_HOUSE, (payload, username)).rowcount > 0
 
 
 def get_user_house(username: str) -> Optional[Any]:
     """Get user's house variables."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT user_house FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        
-        if not row or row[0] is None:
-            return None
-        
-        return _from_json(row[0])
+    raw = _fetch_user_house(username)
+    return None if raw is None else _from_json(raw)
 
 
 # ============================================================
 # Thermostat/Simulation Data
 # ============================================================
 
+# Buffered (sim_inside_temp, last_updated) per user_id, not yet written.
+# Readers overlay these on the stored row, so buffering is invisible to
+# callers; the lock keeps a read from slipping between a flush's commit
+# and the buffer being cleared.  Composite reads run their query without
+# the lock and only take it for the overlay: _flush_generation counts
+# flushes that wrote rows, and a read that saw it change re-runs its query.
+_pending_temps: dict[int, tuple[float, str]] = {}
+_pending_lock = threading.RLock()
+_last_flush = time.monotonic()
+_flush_generation = 0
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _flush_pending_temps() -> None:
+    """Write all buffered temperatures in one transaction (caller holds the lock)."""
+    global _last_flush, _flush_generation
+    _last_flush = time.monotonic()
+    if not _pending_temps:
+        return
+    rows = [(uid, temp, ts) for uid, (temp, ts) in _pending_temps.items()]
+    with get_connection(write=True) as conn:
+        conn.executemany(_SQL_UPSERT_SIM_TEMP, rows)
+    _pending_temps.clear()
+    _flush_generation += 1
+
+
+def _pending_since(user_id: int, generation: int) -> Any:
+    """Buffered (temp, last_updated) for user_id, None if nothing is buffered.
+
+    _MISS if a flush has written rows since `generation` was read: the row
+    queried meanwhile may predate it, so the caller must query again.
+    """
+    with _pending_lock:
+        if _flush_generation != generation:
+            return _MISS
+        return _pending_temps.get(user_id)
+
+
+def flush_simulated_temps() -> None:
+    """Write any buffered simulated temperatures now (e.g. on shutdown)."""
+    with _pending_lock:
+        _flush_pending_temps()
+
+
+atexit.register(flush_simulated_temps)
+
+
 def get_simulated_temp(user_id: int) -> Optional[float]:
     """Get simulated indoor temperature for a user."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT sim_inside_temp FROM user_thermostat WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cur.fetchone()
-        return row["sim_inside_temp"] if row else None
+    with _pending_lock:
+        if user_id in _pending_temps:
+            return _pending_temps[user_id][0]
+        return _fetch_sim_temp(user_id)
 
 
 def get_last_updated(user_id: int) -> Optional[str]:
     """Get the last update timestamp for a user's simulation."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT last_updated FROM user_thermostat WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cur.fetchone()
-        return row["last_updated"] if row else None
-
-
-def update_simulated_temp(user_id: int, new_temp: float) -> None:
-    """Update or insert simulated indoor temperature."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO user_thermostat (user_id, sim_inside_temp, last_updated)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(user_id) DO UPDATE SET
-                sim_inside_temp = excluded.sim_inside_temp,
-                last_updated = CURRENT_TIMESTAMP
-        """, (user_id, new_temp))
+    with _pending_lock:
+        if user_id in _pending_temps:
+            return _pending_temps[user_id][1]
+        return _fetch_last_updated(user_id)
+
+
+def update_simulated_temp(user_id: int, new_temp: float) -> Optional[str]:
+    """Update or insert simulated indoor temperature. Returns the new last_updated.
+
+    The write is buffered and flushed with other users' updates once
+    SIM_TEMP_FLUSH_ROWS are pending or SIM_TEMP_FLUSH_SECONDS have passed.
+    """
+    ts = _utc_timestamp()
+    with _pending_lock:
+        _pending_temps[user_id] = (new_temp, ts)
+        if (len(_pending_temps) >= SIM_TEMP_FLUSH_ROWS
+                or time.monotonic() - _last_flush >= SIM_TEMP_FLUSH_SECONDS):
+            _flush_pending_temps()
+    return ts
+
+
+def update_simulated_temp_bulk(rows: list[tuple[int, float]]) -> None:
+    """Update or insert simulated indoor temperatures for many users at once.
+
+    `rows` is a list of (user_id, new_temp) pairs, written together with
+    anything already buffered in a single transaction, so an N-user tick
+    costs one commit instead of N.
+    """
+    if not rows:
+        return
+    ts = _utc_timestamp()
+    with _pending_lock:
+        for user_id, new_temp in rows:
+            _pending_temps[user_id] = (new_temp, ts)
+        _flush_pending_temps()
 
 
 def set_hvac_sim(user_id: int, hvac_sim: Any) -> bool:
     """Store HVAC simulation data."""
     payload = _to_json(hvac_sim)
     
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE user_thermostat SET hvac_sim = ?, last_updated = CURRENT_TIMESTAMP WHERE user_id = ?",
-            (payload, user_id)
-        )
-        return cur.rowcount > 0
+    flush_simulated_temps()    # the row may only exist in the buffer so far
+    with get_connection(write=True) as conn:
+        return conn.execute(_SQL_SET_HVAC_SIM, (payload, user_id)).rowcount > 0
 
 
 def get_hvac_sim(user_id: int) -> Optional[Any]:
     """Get HVAC simulation data."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT hvac_sim FROM user_thermostat WHERE user_id = ?", (user_id,))
-        row = cur.fetchone()
-        
-        if not row or row[0] is None:
-            return None
-        
-        return _from_json(row[0])
+    raw = _fetch_hvac_sim(user_id)
+    return None if raw is None else _from_json(raw)
 
 
 def get_target_setpoint(user_id: int) -> Optional[float]:
     """Get user's target temperature setpoint."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT target_setpoint FROM user_thermostat WHERE user_id = ?",
-            (user_id,)
-        )
-        row = cur.fetchone()
-        return row["target_setpoint"] if row and row["target_setpoint"] is not None else None
+    return _fetch_target_setpoint(user_id)
 
 
 def set_target_setpoint(user_id: int, setpoint: float) -> bool:
     """Set user's target temperature setpoint."""
-    with get_connection() as conn:
-        cur = conn.cursor()
+    flush_simulated_temps()    # the row may only exist in the buffer so far
+    with get_connection(write=True) as conn:
         # First check if user already has a thermostat record
-        cur.execute("SELECT sim_inside_temp FROM user_thermostat WHERE user_id = ?", (user_id,))
-        existing = cur.fetchone()
+        existing = conn.execute(_SQL_SIM_TEMP, (user_id,)).fetchone()
         
         if existing:
             # Update existing record
-            cur.execute("""
-                UPDATE user_thermostat 
-                SET target_setpoint = ?, last_updated = CURRENT_TIMESTAMP
-                WHERE user_id = ?
-            """, (setpoint, user_id))
+            conn.execute(_SQL_SET_TARGET_SETPOINT, (setpoint, user_id))
         else:
-            # Create new record - use 20.0 as default indoor temp (will be updated by simulation)
-            cur.execute("""
-                INSERT INTO user_thermostat (user_id, sim_inside_temp, target_setpoint, last_updated)
-                VALUES (?, 20.0, ?, CURRENT_TIMESTAMP)
-            """, (user_id, setpoint))
+            # Create new record
+            conn.execute(_SQL_INSERT_TARGET_SETPOINT, (user_id, setpoint))
         return True
 
 
@@ -403,28 +918,17 @@ def set_target_setpoint(user_id: int, setpoint: float) -> bool:
 
 def get_appliance_alerts(user_id: int) -> Optional[Any]:
     """Get user's appliance alerts/schedules."""
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT appliance_alerts FROM user_thermostat WHERE user_id = ?", (user_id,))
-        row = cur.fetchone()
-        
-        if not row or row[0] is None:
-            return None
-        
-        return _from_json(row[0])
+    raw = _fetch_appliance_alerts(user_id)
+    return None if raw is None else _from_json(raw)
 
 
 def set_appliance_alerts(user_id: int, alerts: Any) -> bool:
     """Store appliance alerts/schedules for a user."""
     payload = _to_json(alerts)
     
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE user_thermostat SET appliance_alerts = ?, last_updated = CURRENT_TIMESTAMP WHERE user_id = ?",
-            (payload, user_id)
-        )
-        return cur.rowcount > 0
+    flush_simulated_temps()    # the row may only exist in the buffer so far
+    with get_connection(write=True) as conn:
+        return conn.execute(_SQL_SET_APPLIANCE_ALERTS, (payload, user_id)).rowcount > 0
 
 
 # ============================================================
@@ -432,25 +936,71 @@ def set_appliance_alerts(user_id: int, alerts: Any) -> bool:
 # ============================================================
 
 def get_user_state(username: str) -> Optional[dict]:
-    """Get complete user state for simulation."""
-    user_id = get_user_id(username)
-    if user_id is None:
-        return None
+    """Get complete user state for simulation (one query, one connection)."""
+    pending = _MISS
+    while pending is _MISS:
+        generation = _flush_generation
+        with get_connection() as conn:
+            row = _row_cursor(conn).execute(_SQL_USER_STATE, (username,)).fetchone()
+        if row is None:
+            return None
+        pending = _pending_since(row["id"], generation)
+
+    sim_temp, last_updated = pending or (row["sim_inside_temp"], row["last_updated"])
+
+    def _json_col(raw: Any) -> Any:
+        return None if raw is None else _from_json(raw)
 
     return {
-        "id": user_id,
-        "address": get_user_address(username),
-        "house": get_user_house(username),
-        "weather": get_user_weather(username),
-        "weather_date": get_user_weather_date(username),
-        "simulated_temp": get_simulated_temp(user_id),
-        "last_updated": get_last_updated(user_id),
-        "hvac_sim": get_hvac_sim(user_id),
-        "target_setpoint": get_target_setpoint(user_id),
-        "appliance_alerts": get_appliance_alerts(user_id),
+        "id": row["id"],
+        "address": row["address"],
+        "house": _json_col(row["user_house"]),
+        "weather": _stored_weather(row),
+        "weather_date": row["weather_date"],
+        "simulated_temp": sim_temp,
+        "last_updated": last_updated,
+        "hvac_sim": _json_col(row["hvac_sim"]),
+        "target_setpoint": row["target_setpoint"],
+        "appliance_alerts": _json_col(row["appliance_alerts"]),
+    }
+
+
+def set_user_house_bootstrap(username: str, data: Any) -> Optional[dict]:
+    """Save house variables and fetch what the first-submit init needs.
+
+    One transaction: UPDATE user_house (returning the id), then one SELECT
+    by primary key of the current simulated temp (buffer overlaid) and
+    weather. Returns None if the user doesn't exist.
+
+    The weather JSON is only parsed when the temp is still unset; otherwise
+    "weather" is None, so re-submits skip decoding the whole forecast.
+    """
+    payload = _to_json(data)
+
+    generation = _flush_generation
+    with get_connection(write=True) as conn:
+        # RETURNING (SQLite 3.35+) hands back the id without a second lookup
+        updated = conn.execute(_SQL_SET_USER_HOUSE_RETURNING_ID, (payload, username)).fetchone()
+        if updated is None:
+            return None
+        row = _row_cursor(conn).execute(_SQL_BOOTSTRAP_STATE, (updated[0],)).fetchone()
+    pending = _pending_since(row["id"], generation)
+    while pending is _MISS:
+        # A flush landed after the SELECT: re-read outside the write transaction
+        generation = _flush_generation
+        with get_connection() as conn:
+            row = _row_cursor(conn).execute(_SQL_BOOTSTRAP_STATE, (row["id"],)).fetchone()
+        pending = _pending_since(row["id"], generation)
+
+    sim_temp = pending[0] if pending else row["sim_inside_temp"]
+    return {
+        "id": row["id"],
+        "simulated_temp": sim_temp,
+        "weather": _stored_weather(row) if sim_temp is None else None,
     }
 
 
 # Aliases for backward compatibility
 save_user_weather = set_user_weather
 save_user_house = set_user_house
+